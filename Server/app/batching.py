@@ -0,0 +1,189 @@
+"""
+Micro-batching
+Coalesces concurrent small requests for the same model into one inference
+call. Requests wait up to max_wait_ms, or until max_rows rows are pending,
+then run as a single batch on the model's worker lane; every caller gets
+its own slice of the result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+import pandas as pd
+
+from .inference_executor import InferenceExecutor
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def split_result(result: Dict[str, Any], sizes: List[int]) -> List[Dict[str, Any]]:
+    """Slice a batched loader result back into per-request results."""
+    parts = []
+    offset = 0
+    for size in sizes:
+        part = {}
+        for key, value in result.items():
+            part[key] = value[offset:offset + size] if isinstance(value, list) else value
+        parts.append(part)
+        offset += size
+    return parts
+
+
+def predict_rows(loader: Any, frames: List[pd.DataFrame]) -> List[Dict[str, Any]]:
+    """One predict call over the rows of every request, stacked into one input array."""
+    combined = loader.schema.stack(frames) if len(frames) > 1 else frames[0]
+    result = loader.predict(combined)
+    return split_result(result, [len(frame) for frame in frames])
+
+
+def predict_sequences(loader: Any, frames: List[Any]) -> List[Dict[str, Any]]:
+    """Windows of every request packed into shared LSTM batches."""
+    with metrics.stage("prepare"):
+        window_sets = [loader.prepare_data(frame) for frame in frames]
+    predictions = loader.predict_sequences(*window_sets)
+    results = []
+    offset = 0
+    for windows in window_sets:
+        count = len(windows)
+        results.append({
+            "predictions": predictions[offset:offset + count].tolist(),
+            "unit": "cycles",
+            "sequences_used": count,
+        })
+        offset += count
+    return results
+
+
+class _Pending:
+    def __init__(self, loader: Any, item: Any, rows: int, future: asyncio.Future):
+        self.loader = loader
+        self.item = item
+        self.rows = rows
+        self.future = future
+
+
+class MicroBatcher:
+    """Dynamic batching for one model."""
+
+    def __init__(
+        self,
+        model_name: str,
+        executor: InferenceExecutor,
+        run_batch: Callable[[Any, List[Any]], List[Any]],
+        max_rows: int = 1024,
+        max_wait_ms: float = 5.0,
+    ):
+        self.model_name = model_name
+        self.executor = executor
+        self.run_batch = run_batch
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[_Pending] = []
+        self._pending_rows = 0
+        self._timer: asyncio.TimerHandle | None = None
+        # Histograms of requests and rows per executed batch
+        self.request_histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.row_histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, loader: Any, item: Any, rows: int) -> Any:
+        """Queue one request and wait for its slice of the batched result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Pending(loader, item, rows, future))
+        self._pending_rows += rows
+
+        if self._pending_rows >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        self._pending_rows = 0
+
+        # A model reload can change the loader between requests; batch per loader
+        groups: List[Tuple[Any, List[_Pending]]] = []
+        for entry in pending:
+            if groups and groups[-1][0] is entry.loader:
+                groups[-1][1].append(entry)
+            else:
+                groups.append((entry.loader, [entry]))
+
+        for loader, entries in groups:
+            self._record(entries)
+            try:
+                task = self.executor.submit(self.model_name, self._run, loader, [e.item for e in entries])
+            except Exception as e:
+                for entry in entries:
+                    if not entry.future.done():
+                        entry.future.set_exception(e)
+                continue
+            task.add_done_callback(lambda t, entries=entries: self._distribute(t, entries))
+
+    def _run(self, loader: Any, items: List[Any]) -> List[Any]:
+        """Run the batch; if it fails, score requests one by one so each gets its own error."""
+        try:
+            return self.run_batch(loader, items)
+        except Exception:
+            if len(items) == 1:
+                raise
+            logger.warning(f"⚠️ Batch of {len(items)} failed for {self.model_name}, retrying individually")
+            results = []
+            for item in items:
+                try:
+                    results.append(self.run_batch(loader, [item])[0])
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    @staticmethod
+    def _distribute(task: asyncio.Future, entries: List[_Pending]) -> None:
+        if task.cancelled() or task.exception() is not None:
+            error = asyncio.CancelledError() if task.cancelled() else task.exception()
+            for entry in entries:
+                if not entry.future.done():
+                    entry.future.set_exception(error)
+            return
+        for entry, result in zip(entries, task.result()):
+            if entry.future.done():
+                continue
+            if isinstance(result, Exception):
+                entry.future.set_exception(result)
+            else:
+                entry.future.set_result(result)
+
+    def _record(self, entries: List[_Pending]) -> None:
+        self.batches += 1
+        self.requests += len(entries)
+        self.request_histogram[_bucket(len(entries))] += 1
+        self.row_histogram[_bucket(sum(e.rows for e in entries))] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [str(b) for b in HISTOGRAM_BUCKETS] + ["+Inf"]
+        return {
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "requests": self.requests,
+            "requests_per_batch": dict(zip(labels, self.request_histogram)),
+            "rows_per_batch": dict(zip(labels, self.row_histogram)),
+        }
+
+
+def _bucket(value: int) -> int:
+    """Index of the first histogram bucket holding value."""
+    return bisect.bisect_left(HISTOGRAM_BUCKETS, value)
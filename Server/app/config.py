@@ -0,0 +1,128 @@
+"""
+Server Configuration
+Runtime settings for the API, read from environment variables.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to the default when unset."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to the default when unset."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean setting: 1/true/yes/on enable it."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name: str, default: str = "") -> List[str]:
+    """Read a comma separated list setting."""
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+def env_per_model_int(name: str) -> Dict[str, int]:
+    """
+    Read a per-model integer mapping.
+    Format: "model_a=1,model_b=4"
+    """
+    value = os.getenv(name, "")
+    mapping: Dict[str, int] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, number = item.partition("=")
+        mapping[key.strip()] = int(number)
+    return mapping
+
+
+# Model loading
+# Models loaded in the background at startup ("all" for every model);
+# the rest are loaded on their first request
+PRELOAD_MODELS = env_list("PRELOAD_MODELS")
+# Reload models whose artifact changes under MODEL_DIR (needs watchfiles)
+MODEL_WATCH = env_bool("MODEL_WATCH")
+# Token required in the X-Admin-Token header by admin endpoints; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+# Inference executor
+# Each model gets its own worker lane so heavy TensorFlow requests cannot
+# occupy the threads used by the cheap sklearn models.
+INFERENCE_DEFAULT_CONCURRENCY = env_int("INFERENCE_DEFAULT_CONCURRENCY", 2)
+INFERENCE_CONCURRENCY = {
+    "remaining_useful_life": 1,
+    **env_per_model_int("INFERENCE_CONCURRENCY"),
+}
+# Requests allowed to wait per model before the API answers 503
+INFERENCE_MAX_QUEUE = env_int("INFERENCE_MAX_QUEUE", 16)
+
+# Remaining useful life LSTM
+# Sliding windows copied and scored per model call
+RUL_BATCH_SIZE = env_int("RUL_BATCH_SIZE", 1024)
+# Inference backend: keras, function (compiled tf.function) or xla
+RUL_BACKEND = os.getenv("RUL_BACKEND", "keras")
+
+# Tree ensembles (engine maintenance, durability)
+# Inference engine: sklearn, or compiled (flat NumPy node arrays, same probabilities)
+TREE_ENGINE = os.getenv("TREE_ENGINE", "sklearn")
+# Batches above this many rows use sklearn's own traversal even when compiled; 0 never does
+TREE_ENGINE_MAX_ROWS = env_int("TREE_ENGINE_MAX_ROWS", 256)
+
+# Upload ingestion
+# Rows parsed and scored at a time for row-wise models
+CSV_CHUNK_ROWS = env_int("CSV_CHUNK_ROWS", 50_000)
+
+# Prediction responses
+# Content-Encodings offered for JSON responses, preferred first (br needs brotli); empty disables compression
+RESPONSE_ENCODINGS = env_list("RESPONSE_ENCODINGS", "br,gzip")
+# JSON responses smaller than this are sent uncompressed
+RESPONSE_COMPRESSION_MIN_BYTES = env_int("RESPONSE_COMPRESSION_MIN_BYTES", 1024)
+
+# Prediction cache
+# Byte budget for cached responses; 0 disables the cache
+PREDICTION_CACHE_MAX_BYTES = env_int("PREDICTION_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# Seconds before a cached response expires; 0 keeps entries until evicted
+PREDICTION_CACHE_TTL = env_float("PREDICTION_CACHE_TTL", 0)
+
+# Micro-batching of small concurrent requests
+# Models whose small requests are coalesced ("all" for every supported model)
+BATCH_MODELS = env_list("BATCH_MODELS")
+# A batch runs once this many rows are pending...
+BATCH_MAX_ROWS = env_int("BATCH_MAX_ROWS", 1024)
+# ...or once the oldest request has waited this long
+BATCH_MAX_WAIT_MS = env_float("BATCH_MAX_WAIT_MS", 5.0)
+# Larger uploads skip batching and are scored on their own
+BATCH_MAX_UPLOAD_BYTES = env_int("BATCH_MAX_UPLOAD_BYTES", 256 * 1024)
+
+# Batch jobs
+# Directory for job uploads, results and the SQLite job store (default: Server/jobs)
+JOB_DIR = os.getenv("JOB_DIR") or None
+# Jobs scored at the same time
+JOB_WORKERS = env_int("JOB_WORKERS", 1)
+# A running job whose worker process has not renewed its claim for this long
+# (it died or was stopped) is queued again for another worker
+JOB_LEASE_SECONDS = env_float("JOB_LEASE_SECONDS", 60.0)
+# Finished jobs and their files are removed after this long (0 keeps them)
+JOB_RETENTION_SECONDS = env_float("JOB_RETENTION_SECONDS", 7 * 24 * 3600.0)
+
+# Live telemetry
+# Units one WebSocket connection may track at a time
+TELEMETRY_MAX_UNITS = env_int("TELEMETRY_MAX_UNITS", 1000)
@@ -8,14 +8,19 @@ from __future__ import annotations
 
 import pickle
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict
 import logging
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import StandardScaler
 from sklearn.base import BaseEstimator, TransformerMixin
 
+from .metrics import metrics
+from .scoring import classify
+from .tree_engine import DEFAULT_MAX_ROWS, ENGINES, compile_trees
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,12 +70,113 @@ class CSVFeatureExtractor(BaseEstimator, TransformerMixin):
 
         return np.array(features).reshape(1, -1)
 
+    def transform_windows(self, X, stride: int = 1):
+        """
+        Transform every WINDOW_SIZE-row window into a feature vector.
+        Statistics are computed for all windows in one vectorized pass over
+        the SENSORS matrix. With stride > 1 only every stride-th window is
+        kept, counted back from the most recent one so it is always included.
+
+        Returns:
+            (features, window_ends): an (n_windows, 36) matrix in the same
+            column order as transform(), and the index of each window's last row.
+        """
+        if len(X) < WINDOW_SIZE:
+            raise ValueError(f"CSV must contain at least {WINDOW_SIZE} rows")
+
+        missing = [s for s in SENSORS if s not in X.columns]
+        if missing:
+            raise ValueError(f"Missing sensor: {missing[0]}")
+
+        data = X[SENSORS].to_numpy(dtype=np.float64)
+        # (windows, sensors, WINDOW_SIZE) view, no copies
+        windows = sliding_window_view(data, WINDOW_SIZE, axis=0)
+        first = (len(windows) - 1) % stride
+        windows = windows[first::stride]
+
+        features = window_features(windows)
+        window_ends = np.arange(first, first + len(windows) * stride, stride) + WINDOW_SIZE - 1
+        return features, window_ends
+
+
+def window_features(windows: np.ndarray) -> np.ndarray:
+    """
+    Feature vectors of (n_windows, sensors, WINDOW_SIZE) sensor windows,
+    in CSVFeatureExtractor.transform column order.
+    """
+    mean = windows.mean(axis=2)
+    std = windows.std(axis=2)
+    delta = windows[:, :, -1] - windows[:, :, 0]
+
+    # Interleave to [mean, std, delta] per sensor, matching transform()
+    return np.stack([mean, std, delta], axis=2).reshape(len(windows), -1)
+
+
+class RollingWindowFeatures:
+    """
+    CSVFeatureExtractor.transform features of the latest WINDOW_SIZE rows,
+    updated one row at a time for streaming.
+    Each sensor's mean and sum of squared deviations are updated with
+    Welford's method as a row enters the window and the oldest one leaves,
+    so a row costs O(sensors) instead of O(WINDOW_SIZE * sensors). They are
+    recomputed from the buffered rows once per window so rounding errors
+    cannot accumulate over a long stream.
+    """
+
+    def __init__(self, length: int = WINDOW_SIZE, width: int = len(SENSORS)):
+        self.length = length
+        # Ring buffer of the window's rows, needed for the leaving row and for last - first
+        self._rows = np.zeros((length, width), dtype=np.float64)
+        self._mean = np.zeros(width)
+        self._m2 = np.zeros(width)
+        self.count = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.length
+
+    def push(self, row: np.ndarray) -> None:
+        """Add one row of SENSORS readings, dropping the oldest once the window is full."""
+        row = np.asarray(row, dtype=np.float64)
+        slot = self.count % self.length
+        if self.count < self.length:
+            delta = row - self._mean
+            self._mean += delta / (self.count + 1)
+            self._m2 += delta * (row - self._mean)
+        else:
+            old = self._rows[slot]
+            old_mean = self._mean
+            self._mean = old_mean + (row - old) / self.length
+            self._m2 += (row - old) * (row - self._mean + old - old_mean)
+        self._rows[slot] = row
+        self.count += 1
+        if self.count > self.length and self.count % self.length == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        self._mean = self._rows.mean(axis=0)
+        self._m2 = np.square(self._rows - self._mean).sum(axis=0)
+
+    def features(self) -> np.ndarray:
+        """A (1, 36) feature row in the same column order as transform()."""
+        if not self.full:
+            raise ValueError(f"Need {self.length} rows, have {self.count}")
+        # Population std, as numpy's default ddof=0 in transform()
+        std = np.sqrt(np.maximum(self._m2, 0.0) / self.length)
+        newest = self._rows[(self.count - 1) % self.length]
+        oldest = self._rows[self.count % self.length]
+        return np.stack([self._mean, std, newest - oldest], axis=1).reshape(1, -1)
+
 
 class EngineMaintenanceLoader:
     """Loader for engine maintenance prediction model."""
     
-    def __init__(self, model_path: str | Path):
+    def __init__(self, model_path: str | Path, tree_engine: str = "sklearn", max_rows: int = DEFAULT_MAX_ROWS):
+        if tree_engine not in ENGINES:
+            raise ValueError(f"Unknown tree engine '{tree_engine}', expected one of {ENGINES}")
         self.model_path = Path(model_path)
+        self.tree_engine = tree_engine
+        self.max_rows = max_rows
         self.pipeline = None
         self.feature_extractor = None
         self.scaler = None
@@ -87,7 +193,7 @@ class EngineMaintenanceLoader:
             
             self.feature_extractor = self.pipeline.get("feature_extractor")
             self.scaler = self.pipeline.get("scaler")
-            self.model = self.pipeline.get("model")
+            self.model = compile_trees(self.pipeline.get("model"), self.tree_engine, self.max_rows)
             self.label_map = self.pipeline.get("label_map", {
                 0: "HEALTHY", 
                 1: "MAINTENANCE", 
@@ -120,9 +226,10 @@ class EngineMaintenanceLoader:
             logger.error(f"❌ Data preparation failed: {e}")
             raise
     
-    def predict(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def predict(self, df: pd.DataFrame, probabilities: bool = False) -> Dict[str, Any]:
         """
         Make predictions on the provided data.
+        Class probabilities are included only when requested.
         
         Returns:
             Dict with predictions and metadata
@@ -130,28 +237,80 @@ class EngineMaintenanceLoader:
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        X_scaled = self.prepare_data(df)
+        with metrics.stage("prepare"):
+            X_scaled = self.prepare_data(df)
         
         try:
-            # Get class predictions
-            pred_class = self.model.predict(X_scaled)[0]
-            
-            # Get probabilities if available
-            try:
-                probabilities = self.model.predict_proba(X_scaled)[0]
-            except:
-                probabilities = None
+            # Class prediction is the argmax of a single probability pass
+            pred_classes, proba = classify(self.model, X_scaled)
+            pred_class = int(pred_classes[0])
             
             result = {
-                "prediction": int(pred_class),
-                "label": self.label_map.get(int(pred_class), "Unknown"),
-                "probabilities": probabilities.tolist() if probabilities is not None else None
+                "prediction": pred_class,
+                "label": self.label_map.get(pred_class, "Unknown"),
+                "probabilities": proba[0].tolist() if probabilities and proba is not None else None
             }
             return result
         except Exception as e:
             logger.error(f"❌ Prediction failed: {e}")
             raise
     
+    def predict_windows(self, df: pd.DataFrame, stride: int = 1, probabilities: bool = False) -> Dict[str, Any]:
+        """
+        Score every WINDOW_SIZE-cycle window (or every stride-th one).
+        Gives the engine's health trajectory from a single upload using one
+        batched scaler and model call.
+        
+        Returns:
+            Dict with per-window predictions, labels and window end positions
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded")
+        if self.feature_extractor is None or self.scaler is None:
+            raise ValueError("Feature extractor or scaler not loaded")
+        if stride < 1:
+            raise ValueError("stride must be at least 1")
+        
+        try:
+            with metrics.stage("prepare"):
+                X_features, window_ends = self.feature_extractor.transform_windows(df, stride=stride)
+                X_scaled = self.scaler.transform(X_features)
+            
+            result = self._classify_scaled(X_scaled, probabilities)
+            
+            # Report cycle numbers when the CSV has them, row positions otherwise
+            if "cycle" in df.columns:
+                window_ends = df["cycle"].to_numpy()[window_ends]
+            result["window_end"] = window_ends.tolist()
+            return result
+        except Exception as e:
+            logger.error(f"❌ Prediction failed: {e}")
+            raise
+    
+    def predict_features(self, X_features: np.ndarray, probabilities: bool = False) -> Dict[str, Any]:
+        """
+        Scale and score feature vectors that were already extracted
+        (one row per window, in CSVFeatureExtractor.transform order).
+        
+        Returns:
+            Dict with per-row predictions and labels
+        """
+        if self.model is None or self.scaler is None:
+            raise ValueError("Model not loaded")
+        
+        with metrics.stage("prepare"):
+            X_scaled = self.scaler.transform(X_features)
+        return self._classify_scaled(X_scaled, probabilities)
+    
+    def _classify_scaled(self, X_scaled: np.ndarray, probabilities: bool) -> Dict[str, Any]:
+        pred_classes, proba = classify(self.model, X_scaled)
+        predictions = pred_classes.astype(int).tolist()
+        return {
+            "predictions": predictions,
+            "labels": [self.label_map.get(p, "Unknown") for p in predictions],
+            "probabilities": proba.tolist() if probabilities and proba is not None else None
+        }
+    
     def is_loaded(self) -> bool:
         """Check if model is properly loaded."""
         return self.model is not None and self.scaler is not None and self.feature_extractor is not None
@@ -0,0 +1,144 @@
+"""
+Inference Executor
+Runs CSV parsing and model inference off the event loop.
+Every model gets a bounded worker lane: a fixed number of threads and a
+limited number of waiting requests. When the lane is full, callers get
+InferenceQueueFull instead of piling up behind a slow model. Background
+work (batch jobs) goes through the same lanes and waits for room instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import logging
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when a model lane has no room for another request."""
+
+
+def _run_bound(model_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run func with stage timings on this worker attributed to model_name."""
+    with metrics.bind(model_name):
+        return func(*args, **kwargs)
+
+
+class _Lane:
+    """Worker threads and admission counter for a single model."""
+
+    def __init__(self, model_name: str, concurrency: int, max_queue: int):
+        self.concurrency = concurrency
+        self.capacity = concurrency + max_queue
+        self.pending = 0
+        # Guards pending; background callers wait on it for room in the lane
+        self.room = threading.Condition()
+        self.pool = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix=f"infer-{model_name}",
+        )
+
+
+class InferenceExecutor:
+    """Per-model thread pools with bounded queues."""
+
+    def __init__(
+        self,
+        default_concurrency: int = 2,
+        max_queue: int = 16,
+        concurrency: Dict[str, int] | None = None,
+    ):
+        self.default_concurrency = max(1, default_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.concurrency = dict(concurrency or {})
+        self._lanes: Dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, model_name: str) -> _Lane:
+        with self._lock:
+            lane = self._lanes.get(model_name)
+            if lane is None:
+                workers = max(1, self.concurrency.get(model_name, self.default_concurrency))
+                lane = _Lane(model_name, workers, self.max_queue)
+                self._lanes[model_name] = lane
+            return lane
+
+    @staticmethod
+    def _release(lane: _Lane) -> None:
+        with lane.room:
+            lane.pending -= 1
+            lane.room.notify()
+
+    def submit(self, model_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> asyncio.Future:
+        """
+        Queue func(*args, **kwargs) on the model's worker lane and return its future.
+        Must be called from the event loop thread.
+
+        Raises:
+            InferenceQueueFull: if the lane already holds its maximum of
+                running and waiting requests.
+        """
+        lane = self._lane(model_name)
+        with lane.room:
+            if lane.pending >= lane.capacity:
+                logger.warning(f"⚠️ Inference queue full for {model_name} ({lane.pending} pending)")
+                raise InferenceQueueFull(f"Model '{model_name}' is busy, try again later.")
+            lane.pending += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            lane.pool, functools.partial(_run_bound, model_name, func, *args, **kwargs)
+        )
+        # Released when the worker is done, even if the caller stopped waiting
+        future.add_done_callback(lambda _: self._release(lane))
+        return future
+
+    async def run(self, model_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func(*args, **kwargs) on the model's worker lane and wait for the result."""
+        return await self.submit(model_name, func, *args, **kwargs)
+
+    def call(self, model_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run func(*args, **kwargs) on the model's worker lane from a thread
+        outside the event loop and block until it is done. Waits while the
+        lane is full rather than raising InferenceQueueFull.
+        """
+        lane = self._lane(model_name)
+        with lane.room:
+            while lane.pending >= lane.capacity:
+                lane.room.wait()
+            lane.pending += 1
+        try:
+            future = lane.pool.submit(_run_bound, model_name, func, *args, **kwargs)
+        except BaseException:
+            self._release(lane)
+            raise
+        future.add_done_callback(lambda _: self._release(lane))
+        return future.result()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Current concurrency and queue depth for every lane."""
+        with self._lock:
+            return {
+                name: {
+                    "concurrency": lane.concurrency,
+                    "capacity": lane.capacity,
+                    "pending": lane.pending,
+                }
+                for name, lane in self._lanes.items()
+            }
+
+    def shutdown(self) -> None:
+        """Stop all worker lanes, letting running jobs finish."""
+        with self._lock:
+            lanes = list(self._lanes.values())
+            self._lanes.clear()
+        for lane in lanes:
+            lane.pool.shutdown(wait=True)
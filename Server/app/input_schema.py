@@ -0,0 +1,193 @@
+"""
+Input Schema
+The columns a model reads, in training order, and the dtype its estimator
+computes in. A schema is compiled once when the model loads; every upload
+chunk is then validated and written into one contiguous NumPy array in a
+single pass, instead of selecting and copying DataFrame columns and having
+sklearn check the feature names again on every call.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from typing import Any, Dict, Iterator, List, Sequence
+import logging
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.pipeline import Pipeline
+from sklearn.tree import BaseDecisionTree
+
+logger = logging.getLogger(__name__)
+
+# Estimators that cast their input to float32 themselves before scoring
+FLOAT32_ESTIMATORS = (
+    BaseDecisionTree,
+    RandomForestClassifier,
+    RandomForestRegressor,
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+)
+
+
+class SchemaError(ValueError):
+    """Raised when an upload does not match a model's input schema."""
+
+
+class InputSchema:
+    """
+    Ordered input columns of a model and the dtype they are converted to.
+    Arrays are column-major ("F") by default, so each column is filled by
+    one contiguous copy; "C" suits consumers that read whole rows, such as
+    the LSTM's sliding windows. Boolean columns (one-hot dummies uploaded as
+    True/False) are only distinguished when parsing CSV.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        dtype: Any = np.float64,
+        order: str = "F",
+        boolean: Sequence[str] = (),
+    ):
+        self.columns = tuple(columns)
+        self.dtype = np.dtype(dtype)
+        self.order = order
+        self.boolean = frozenset(boolean)
+
+    def __repr__(self) -> str:
+        return f"InputSchema({len(self.columns)} columns, {self.dtype}, order={self.order})"
+
+    def csv_types(self) -> Dict[str, str]:
+        """
+        Arrow types the columns are parsed as from CSV. Numbers are parsed
+        as float64 even for float32 schemas and converted afterwards, so
+        values round exactly as they did when pandas parsed them.
+        """
+        return {column: "bool" if column in self.boolean else "float64" for column in self.columns}
+
+    def empty(self, rows: int) -> np.ndarray:
+        return np.empty((rows, len(self.columns)), dtype=self.dtype, order=self.order)
+
+    def to_array(self, data: pd.DataFrame | np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Validate the data and return it as a contiguous (rows, columns)
+        array of the schema dtype. DataFrame columns are looked up by name
+        and may come in any order; extra columns are ignored. Arrays must
+        already be in schema column order and are returned as they are when
+        their dtype and layout already fit.
+        """
+        if isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[1] != len(self.columns):
+                raise SchemaError(f"Expected {len(self.columns)} columns, got shape {data.shape}")
+            if out is not None:
+                out[:] = data
+                return out
+            if data.dtype == self.dtype and (data.flags.c_contiguous or data.flags.f_contiguous):
+                return data
+            return np.asarray(data, dtype=self.dtype, order=self.order)
+
+        missing = [column for column in self.columns if column not in data.columns]
+        if missing:
+            raise SchemaError(f"Missing columns: {missing}")
+        if out is None:
+            out = self.empty(len(data))
+
+        for i, column in enumerate(self.columns):
+            series = data[column]
+            if isinstance(series, pd.DataFrame):
+                raise SchemaError(f"Column '{column}' appears more than once")
+            if not (is_numeric_dtype(series.dtype) or is_bool_dtype(series.dtype)):
+                raise SchemaError(f"Column '{column}' must be numeric, got {series.dtype}")
+            if isinstance(series.dtype, np.dtype):
+                out[:, i] = series.to_numpy()
+            else:
+                # Nullable extension dtypes: missing values become NaN
+                out[:, i] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return out
+
+    def stack(self, frames: List[pd.DataFrame | np.ndarray]) -> np.ndarray:
+        """Convert several chunks into one array, written straight into place."""
+        out = self.empty(sum(len(frame) for frame in frames))
+        start = 0
+        for frame in frames:
+            self.to_array(frame, out[start:start + len(frame)])
+            start += len(frame)
+        return out
+
+
+def _first_step(model: Any) -> Any:
+    return model.steps[0][1] if isinstance(model, Pipeline) else model
+
+
+def estimator_dtype(model: Any) -> np.dtype:
+    """The dtype the model's first estimator computes in."""
+    return np.dtype(np.float32 if isinstance(_first_step(model), FLOAT32_ESTIMATORS) else np.float64)
+
+
+def compile_schema(
+    model: Any, columns: Sequence[str] | None = None, boolean_prefixes: Sequence[str] = ()
+) -> InputSchema:
+    """
+    Build the schema of a fitted sklearn model from its training feature
+    names (or the given columns), which must match them. The model is left
+    untouched. Columns starting with one of boolean_prefixes are one-hot
+    dummies of a categorical feature.
+    """
+    first = _first_step(model)
+    fitted = getattr(first, "feature_names_in_", None)
+    if columns is None:
+        if fitted is None:
+            raise ValueError("Model was fitted without feature names and no input columns were given")
+        columns = list(fitted)
+    if fitted is not None and list(fitted) != list(columns):
+        raise ValueError("Input columns do not match the model's training feature names")
+    prefixes = tuple(boolean_prefixes)
+    boolean = [column for column in columns if prefixes and column.startswith(prefixes)]
+    return InputSchema(columns, estimator_dtype(model), boolean=boolean)
+
+
+# Scoring blocks inside unnamed_features(), and the filter they share
+_unnamed_lock = threading.Lock()
+_unnamed_depth = 0
+_unnamed_filter: Any = None
+
+
+@contextlib.contextmanager
+def unnamed_features() -> Iterator[None]:
+    """
+    Silence sklearn's "X does not have valid feature names" warning for the
+    estimator calls inside the block. They get plain arrays built by a
+    schema, already in training order, instead of named DataFrames.
+    warnings.catch_warnings swaps the process-wide filter list, which is not
+    safe with several inference threads, so the first block to enter adds
+    the filter and the last one to leave removes just that filter.
+    """
+    global _unnamed_depth, _unnamed_filter
+    with _unnamed_lock:
+        if _unnamed_depth == 0:
+            warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+            _unnamed_filter = warnings.filters[0]
+        _unnamed_depth += 1
+    try:
+        yield
+    finally:
+        with _unnamed_lock:
+            _unnamed_depth -= 1
+            if _unnamed_depth == 0:
+                with contextlib.suppress(ValueError):
+                    warnings.filters.remove(_unnamed_filter)
+                _unnamed_filter = None
@@ -0,0 +1,451 @@
+"""
+Batch Jobs
+Background scoring of large uploads. A job stores its upload on disk, is
+scored chunk by chunk on a worker pool with its progress recorded in a local
+SQLite database, and writes its predictions to a CSV or Parquet result file.
+The database is shared by every server process using the job directory: a
+job runs in the process that claims it, which keeps its claim alive with a
+heartbeat, and is queued again once that lease lapses (the process died or
+stopped). Cancellation is read back from the database, so any process can
+cancel a job, and finished jobs are removed after a retention period.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import logging
+
+import pandas as pd
+
+from .upload_formats import open_decompressed, split_compression
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+UPLOADING = "uploading"
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+RESULT_FORMATS = ("csv", "parquet")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT,
+    input_format TEXT NOT NULL,
+    result_format TEXT NOT NULL,
+    options TEXT NOT NULL,
+    rows_total INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+)
+"""
+# Columns added since the first schema, for job stores created before them
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+# Scores one job: yields (input rows consumed, predictions frame) per chunk
+ScoreFn = Callable[[Dict[str, Any], Path], Iterator[Tuple[int, pd.DataFrame]]]
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it was cancelled or its claim was lost."""
+
+
+class JobStore:
+    """Job records in SQLite plus one directory per job for its files."""
+
+    def __init__(self, job_dir: Path):
+        self.job_dir = Path(job_dir)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def open(self) -> None:
+        """Create the job directory and database on first use."""
+        with self._lock:
+            if self._db is not None:
+                return
+            self.job_dir.mkdir(parents=True, exist_ok=True)
+            # Other worker processes write to the same database; wait for their locks
+            self._db = sqlite3.connect(self.job_dir / "jobs.sqlite3", timeout=30, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            with self._db:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(_SCHEMA)
+                columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+                for name, kind in _ADDED_COLUMNS.items():
+                    if name not in columns:
+                        self._db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    def path(self, job_id: str) -> Path:
+        return self.job_dir / job_id
+
+    def input_path(self, job: Dict[str, Any]) -> Path:
+        return self.path(job["id"]) / f"input.{job['input_format']}"
+
+    def result_path(self, job: Dict[str, Any], owner: str | None = None) -> Path:
+        """
+        Result file written by one claim of the job, by default the claim that
+        finished it. Overlapping runs never share a file, and finish() decides
+        which one is the result.
+        """
+        return self.path(job["id"]) / f"result.{owner or job['owner']}.{job['result_format']}"
+
+    def create(
+        self,
+        model_name: str,
+        filename: str | None,
+        input_format: str,
+        result_format: str,
+        options: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Add a job whose upload is still being stored; queue() it once it is."""
+        job_id = uuid.uuid4().hex
+        self.path(job_id).mkdir(parents=True)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, model, status, filename, input_format, result_format, options, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, model_name, UPLOADING, filename, input_format, result_format, json.dumps(options), time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_dict(row) if row is not None else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_job_dict(row) for row in rows]
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._db:
+            self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def queue(self, job_id: str, rows_total: int | None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, rows_total = ? WHERE id = ? AND status = ?",
+                (QUEUED, rows_total, job_id, UPLOADING),
+            )
+
+    def queued(self) -> List[str]:
+        """Jobs waiting for a worker, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def claim(self, job_id: str, owner: str) -> Dict[str, Any] | None:
+        """
+        Mark a queued job as running for this owner. Only one claim of a job
+        succeeds, however many processes try; returns None for the others.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            claimed = self._db.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ?, heartbeat_at = ?, rows_done = 0, error = NULL"
+                " WHERE id = ? AND status = ?",
+                (RUNNING, owner, now, now, job_id, QUEUED),
+            ).rowcount
+        return self.get(job_id) if claimed else None
+
+    def progress(self, job_id: str, owner: str, rows_done: int) -> bool:
+        """Record progress of a claimed job. False once it was cancelled, deleted or reclaimed."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET rows_done = ?, heartbeat_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (rows_done, time.time(), job_id, owner, RUNNING),
+            ).rowcount == 1
+
+    def finish(self, job_id: str, owner: str, **fields: Any) -> bool:
+        """Close a claimed job with a final status; False if the claim was lost."""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._db:
+            return self._db.execute(
+                f"UPDATE jobs SET {columns}, finished_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (*fields.values(), time.time(), job_id, owner, RUNNING),
+            ).rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that is still queued or running; False if it had already finished."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount == 1
+
+    def heartbeat(self, owner: str) -> None:
+        """Renew the lease on every job this owner is running."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?", (time.time(), owner, RUNNING)
+            )
+
+    def release(self, owner: str) -> None:
+        """Queue again the jobs this owner is running, e.g. when it shuts down."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, rows_done = 0, started_at = NULL"
+                " WHERE owner = ? AND status = ?",
+                (QUEUED, owner, RUNNING),
+            )
+
+    def requeue_stale(self, lease_seconds: float) -> List[str]:
+        """Queue again running jobs whose owner stopped renewing its lease."""
+        expired = time.time() - lease_seconds
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (RUNNING, expired),
+            ).fetchall()
+            requeued = []
+            for row in rows:
+                # Same condition again, in case the owner renewed in the meantime
+                if self._db.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, rows_done = 0, started_at = NULL"
+                    " WHERE id = ? AND status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                    (QUEUED, row["id"], RUNNING, expired),
+                ).rowcount:
+                    requeued.append(row["id"])
+        return requeued
+
+    def expired(self, retention_seconds: float) -> List[str]:
+        """Jobs finished longer ago than the retention period, and abandoned uploads."""
+        before = time.time() - retention_seconds
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id FROM jobs WHERE (status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?)"
+                " OR (status = ? AND created_at < ?)",
+                (*FINISHED, before, UPLOADING, before),
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        shutil.rmtree(self.path(job_id), ignore_errors=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def _job_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    return job
+
+
+class _ResultWriter:
+    """Appends prediction frames to a CSV or Parquet file."""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self._csv = None
+        self._parquet = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            if self._csv is None:
+                self._csv = open(self.path, "w", newline="")
+                frame.to_csv(self._csv, index=False)
+            else:
+                frame.to_csv(self._csv, index=False, header=False)
+            return
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table.cast(self._parquet.schema))
+
+    def close(self) -> None:
+        if self._csv is not None:
+            self._csv.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+class JobRunner:
+    """
+    Worker pool that claims queued jobs and records their progress.
+    A maintenance thread renews the leases of this runner's jobs, queues
+    again jobs whose owner stopped renewing theirs, picks up jobs waiting in
+    the shared store (released or queued by another process) and removes
+    expired jobs.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        score: ScoreFn,
+        workers: int = 1,
+        lease_seconds: float = 60.0,
+        retention_seconds: float = 0.0,
+    ):
+        self.store = store
+        self.score = score
+        self.workers = max(1, workers)
+        self.lease_seconds = lease_seconds
+        # 0 keeps finished jobs until they are deleted
+        self.retention_seconds = retention_seconds
+        # Identifies this process's claims in the shared job store
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pool: ThreadPoolExecutor | None = None
+        # Jobs submitted to the pool and not started yet
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the pool and the maintenance thread, then pick up waiting jobs."""
+        self.store.open()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        # Claims decide which process runs a job picked up by several
+        self._maintain()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._maintenance_loop, name="job-maintenance", daemon=True)
+            self._thread.start()
+
+    def submit(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._pending:
+                return
+            self._pending.add(job_id)
+        self._pool.submit(self._run, job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Stop a queued or running job after its current chunk, in whichever
+        process runs it. False if the job had already finished.
+        """
+        return self.store.cancel(job_id)
+
+    def shutdown(self) -> None:
+        # Running jobs stop at their next chunk; releasing them lets another
+        # worker, or this one after a restart, run them again straight away
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.store.release(self.owner)
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 4):
+            try:
+                self._maintain()
+            except Exception as e:
+                logger.error(f"❌ Job maintenance failed: {e}")
+
+    def _maintain(self) -> None:
+        self.store.heartbeat(self.owner)
+        for job_id in self.store.requeue_stale(self.lease_seconds):
+            logger.info(f"♻️ Requeued job {job_id}")
+        for job_id in self.store.queued():
+            self.submit(job_id)
+        if self.retention_seconds > 0:
+            for job_id in self.store.expired(self.retention_seconds):
+                self.store.delete(job_id)
+                logger.info(f"ℹ️ Removed expired job {job_id}")
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            self._pending.discard(job_id)
+        if self._pool is None:
+            return
+        job = self.store.claim(job_id, self.owner)
+        if job is None:
+            # Cancelled, deleted or claimed by another worker
+            return
+
+        started = time.time()
+        result_path = self.store.result_path(job, self.owner)
+        writer = _ResultWriter(result_path, job["result_format"])
+        rows_done = 0
+        try:
+            for rows, frame in self.score(job, self.store.input_path(job)):
+                if self._pool is None:
+                    raise JobCancelled()
+                writer.write(frame)
+                rows_done += rows
+                if not self.store.progress(job_id, self.owner, rows_done):
+                    raise JobCancelled()
+            writer.close()
+        except JobCancelled:
+            writer.close()
+            result_path.unlink(missing_ok=True)
+            logger.info(f"ℹ️ Job {job_id} stopped after {rows_done} rows")
+            return
+        except Exception as e:
+            writer.close()
+            result_path.unlink(missing_ok=True)
+            if self.store.finish(job_id, self.owner, status=FAILED, error=str(e)):
+                logger.error(f"❌ Job {job_id} failed: {e}")
+            else:
+                logger.info(f"ℹ️ Job {job_id} stopped after {rows_done} rows")
+            return
+
+        # Only a run that still holds its claim publishes its file as the result
+        if self.store.finish(job_id, self.owner, status=DONE, rows_done=rows_done, rows_total=rows_done):
+            logger.info(f"✅ Job {job_id} scored {rows_done} rows in {time.time() - started:.2f}s")
+        else:
+            result_path.unlink(missing_ok=True)
+            logger.info(f"ℹ️ Job {job_id} stopped after {rows_done} rows")
+
+
+def count_rows(path: Path, fmt: str) -> int | None:
+    """Input rows of a stored upload, read cheaply where the format allows."""
+    fmt, compression = split_compression(fmt)
+    if fmt in ("csv", "cmapss"):
+        lines = 0
+        last = b"\n"
+        with open(path, "rb") as f:
+            stream = open_decompressed(f, compression)
+            for block in iter(lambda: stream.read(1024 * 1024), b""):
+                lines += block.count(b"\n")
+                last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        return lines - 1 if fmt == "csv" else lines
+    if fmt == "parquet" and pq is not None:
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
@@ -0,0 +1,224 @@
+"""
+Jobs Router
+Endpoints of the background scoring jobs: submit a large upload, follow
+its progress, download its result file and cancel or remove it.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import shutil
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from .jobs import JobRunner, JobStore
+from .metrics import metrics
+from .results import result_columns, shape_for
+from .serving import (
+    BASE_DIR,
+    CLASSIFIER_MODELS,
+    CMAPSS_FORMAT,
+    check_upload_format,
+    executor,
+    parse_and_predict_fleet,
+    read_upload,
+    registry,
+    upload_frames,
+)
+from . import config
+from . import jobs
+from . import upload_formats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def job_frame(model_name: str, result: Dict[str, Any], offset: int, rows: int) -> pd.DataFrame:
+    """Predictions of one scored chunk as result file columns."""
+    if shape_for(model_name).index == "window":
+        index = {"window": np.arange(len(result["predictions"]))}
+    else:
+        index = {"row": np.arange(offset, offset + rows)}
+    return pd.DataFrame({**index, **result_columns(model_name, result)})
+
+
+def score_job(job: Dict[str, Any], input_path: Path) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Score a stored job upload, yielding (input rows, predictions) per chunk.
+    Row-wise models are scored CSV_CHUNK_ROWS rows at a time; engine
+    maintenance scores its full window trajectory and the LSTM scores the
+    whole sequence, or every engine for CMAPSS files and uploads with a
+    UnitNumber column. Runs on a job worker, which hands the loading,
+    parsing and scoring to the model's worker lane so jobs share its
+    concurrency limit with requests.
+    """
+    model_name = job["model"]
+    options = job["options"]
+    fmt = job["input_format"]
+    loader = registry.loaded(model_name) or executor.call(model_name, registry.get, model_name)
+    with_probabilities = options.get("probabilities", False) and model_name in CLASSIFIER_MODELS
+
+    def parse_and_score(predict_fn: Any) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        frame = read_upload(model_name, loader, source, fmt)
+        return frame, predict_fn(frame)
+
+    with metrics.bind(model_name), open(input_path, "rb") as source:
+        if model_name == "remaining_useful_life":
+            if upload_formats.split_compression(fmt)[0] == CMAPSS_FORMAT or options.get("fleet"):
+                rows, result = executor.call(model_name, parse_and_predict_fleet, loader, source, fmt)
+                frame = pd.DataFrame([
+                    {"unit_number": unit["unit_number"], "window_end": end, "rul": rul}
+                    for unit in result["units"]
+                    for end, rul in zip(unit["window_end"], unit["predictions"])
+                ], columns=["unit_number", "window_end", "rul"])
+                yield rows, frame
+            else:
+                frame, result = executor.call(model_name, parse_and_score, loader.predict)
+                yield len(frame), job_frame(model_name, result, 0, len(frame))
+            return
+
+        if model_name == "engine_maintenance":
+            predict_fn = functools.partial(
+                loader.predict_windows, stride=options.get("stride", 1), probabilities=with_probabilities
+            )
+            frame, result = executor.call(model_name, parse_and_score, predict_fn)
+            yield len(frame), pd.DataFrame(result_columns(model_name, result, trajectory=True))
+            return
+
+        predict_fn = functools.partial(loader.predict, probabilities=True) if with_probabilities else loader.predict
+
+        def next_chunk(frames: Iterator[Any]) -> Tuple[Any, Dict[str, Any]] | None:
+            frame = next(frames, None)
+            return None if frame is None else (frame, predict_fn(frame))
+
+        offset = 0
+        with contextlib.closing(upload_frames(model_name, loader, source, fmt, config.CSV_CHUNK_ROWS)) as frames:
+            # One lane call per chunk, so requests get a turn between chunks
+            while True:
+                chunk = executor.call(model_name, next_chunk, frames)
+                if chunk is None:
+                    break
+                frame, result = chunk
+                yield len(frame), job_frame(model_name, result, offset, len(frame))
+                offset += len(frame)
+
+
+job_store = JobStore(Path(config.JOB_DIR) if config.JOB_DIR else BASE_DIR / "jobs")
+job_runner = JobRunner(
+    job_store,
+    score_job,
+    workers=config.JOB_WORKERS,
+    lease_seconds=config.JOB_LEASE_SECONDS,
+    retention_seconds=config.JOB_RETENTION_SECONDS,
+)
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    total = job["rows_total"]
+    return {
+        "job_id": job["id"],
+        "model": job["model"],
+        "status": job["status"],
+        "filename": job["filename"],
+        "options": job["options"],
+        "rows_done": job["rows_done"],
+        "rows_total": total,
+        "progress": job["rows_done"] / total if total else None,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result_url": f"/jobs/{job['id']}/result" if job["status"] == jobs.DONE else None,
+    }
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+def save_job_input(source: BinaryIO, path: Path, fmt: str) -> int | None:
+    """Copy the spooled upload into the job directory and count its rows."""
+    source.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f, 1024 * 1024)
+    return jobs.count_rows(path, fmt)
+
+
+@router.post("/jobs/{model_name}", status_code=202)
+async def submit_job(
+    model_name: str,
+    file: UploadFile = File(...),
+    result_format: str = Query("csv", description="Result file format: csv or parquet"),
+    stride: int = Query(1, ge=1, description="engine_maintenance: score every stride-th window"),
+    probabilities: bool = Query(False, description="Classifiers: add class probability columns"),
+    fleet: bool = Query(False, description="remaining_useful_life: score every engine of a UnitNumber table"),
+) -> Dict[str, Any]:
+    """
+    Queue a large upload for background scoring. Poll GET /jobs/{job_id}
+    for progress and download the predictions from its result_url.
+    """
+    fmt = check_upload_format(file, cmapss=model_name == "remaining_useful_life")
+    if model_name not in registry:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+    if result_format not in jobs.RESULT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"result_format must be one of {', '.join(jobs.RESULT_FORMATS)}")
+    if result_format == "parquet" and not upload_formats.format_available(upload_formats.PARQUET):
+        raise HTTPException(status_code=415, detail="Parquet results are not available on this server.")
+
+    options = {"stride": stride, "probabilities": probabilities, "fleet": fleet}
+    job = job_store.create(model_name, file.filename, fmt, result_format, options)
+    try:
+        rows_total = await run_in_threadpool(save_job_input, file.file, job_store.input_path(job), fmt)
+    except Exception as e:
+        job_store.delete(job["id"])
+        logger.error(f"❌ Could not store upload for job: {e}")
+        raise HTTPException(status_code=500, detail="Could not store the upload.")
+    job_store.queue(job["id"], rows_total)
+    job_runner.submit(job["id"])
+    logger.info(f"ℹ️ Queued job {job['id']} for {model_name} ({rows_total} rows)")
+    return job_status(job_store.get(job["id"]))
+
+
+@router.get("/jobs")
+def list_jobs(limit: int = Query(50, ge=1, le=500)) -> Dict[str, Any]:
+    return {"jobs": [job_status(job) for job in job_store.list(limit)]}
+
+
+@router.get("/jobs/{job_id}")
+def job_details(job_id: str) -> Dict[str, Any]:
+    return job_status(get_job(job_id))
+
+
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str) -> FileResponse:
+    job = get_job(job_id)
+    if job["status"] != jobs.DONE:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}, no result yet.")
+    media_type = "text/csv" if job["result_format"] == "csv" else "application/vnd.apache.parquet"
+    return FileResponse(
+        job_store.result_path(job),
+        media_type=media_type,
+        filename=f"{job['model']}-{job_id}.{job['result_format']}",
+    )
+
+
+@router.delete("/jobs/{job_id}")
+def delete_job(job_id: str) -> Dict[str, Any]:
+    """Cancel the job if it has not finished, then remove it and its files."""
+    job = get_job(job_id)
+    if job["status"] in (jobs.QUEUED, jobs.RUNNING):
+        job_runner.cancel(job_id)
+    job_store.delete(job_id)
+    return {"job_id": job_id, "deleted": True}
@@ -13,6 +13,10 @@ import logging
 import numpy as np
 import pandas as pd
 
+from .input_schema import InputSchema, compile_schema
+from .metrics import metrics
+from .scoring import classify
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +29,7 @@ class LandingGearFaultLoader:
         self.model = None
         self.scaler = None
         self.feature_names = None
+        self.schema: InputSchema | None = None
         
     def load(self) -> None:
         """Load the landing gear fault prediction model."""
@@ -42,30 +47,30 @@ class LandingGearFaultLoader:
                 self.model = loaded
                 self.pipeline = {"model": loaded}
             
+            self.schema = compile_schema(self.model, self.feature_names)
+            self.feature_names = list(self.schema.columns)
+            
             logger.info(f"✅ Loaded landing gear fault model from {self.model_path}")
         except Exception as e:
             logger.error(f"❌ Failed to load landing gear fault model: {e}")
             raise
     
-    def prepare_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_data(self, df: pd.DataFrame | np.ndarray) -> np.ndarray:
         """
         Prepare CSV data for prediction.
-        Ensures correct feature order and types.
+        Validates the columns against the model's input schema and converts
+        them, in training order, into one contiguous array.
         """
         try:
-            if self.feature_names:
-                missing = set(self.feature_names) - set(df.columns)
-                if missing:
-                    raise ValueError(f"Missing columns: {sorted(missing)}")
-                return df[self.feature_names]
-            return df
+            return self.schema.to_array(df)
         except Exception as e:
             logger.error(f"❌ Data preparation failed: {e}")
             raise
     
-    def predict(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def predict(self, df: pd.DataFrame | np.ndarray, probabilities: bool = False) -> Dict[str, Any]:
         """
         Make predictions on the provided data.
+        Class probabilities are included only when requested.
         
         Returns:
             Dict with predictions and metadata
@@ -73,20 +78,16 @@ class LandingGearFaultLoader:
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        df_prepared = self.prepare_data(df)
+        with metrics.stage("prepare"):
+            X = self.prepare_data(df)
         
         try:
-            predictions = self.model.predict(df_prepared)
-            
-            # Get probabilities if available
-            try:
-                probabilities = self.model.predict_proba(df_prepared)
-            except:
-                probabilities = None
+            # Labels are the argmax of a single probability pass
+            predictions, proba = classify(self.model, X)
             
             result = {
-                "predictions": [int(p) for p in predictions],
-                "probabilities": probabilities.tolist() if probabilities is not None else None
+                "predictions": predictions.astype(int).tolist(),
+                "probabilities": proba.tolist() if probabilities and proba is not None else None
             }
             return result
         except Exception as e:
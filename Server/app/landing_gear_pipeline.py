@@ -0,0 +1,89 @@
+"""
+Landing Gear Pipeline
+Chains the landing gear fault model into the landing gear RUL model. The
+upload is parsed once into a shared input array; the predicted fault codes
+and the derived Stiffness_Damping_Product are written into that array and
+the RUL model reads its columns from it, so callers no longer upload the
+same drop tests twice and join the results themselves.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .input_schema import InputSchema
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FAULT_CODE = "Fault_Code"
+PRODUCT = "Stiffness_Damping_Product"
+# Stiffness_Damping_Product is derived as K_Stiffness * B_Damping, as in training
+PRODUCT_FACTORS = ("K_Stiffness", "B_Damping")
+
+
+class LandingGearPipeline:
+    """Fault prediction feeding RUL prediction over one shared input array."""
+
+    def __init__(self, fault_loader: Any, rul_loader: Any):
+        self.fault_loader = fault_loader
+        self.rul_loader = rul_loader
+        fault_columns = list(fault_loader.schema.columns)
+        rul_columns = list(rul_loader.schema.columns)
+        for column in (FAULT_CODE, PRODUCT):
+            if column not in rul_columns:
+                raise ValueError(f"Landing gear RUL model does not read '{column}'")
+
+        # Upload columns: the fault model's inputs first, so they are a leading
+        # slice of the shared array, then any other RUL model inputs
+        derived = (FAULT_CODE, PRODUCT)
+        self.input_columns = fault_columns + [
+            c for c in rul_columns if c not in fault_columns and c not in derived
+        ]
+        for column in PRODUCT_FACTORS:
+            if column not in self.input_columns:
+                raise ValueError(f"Landing gear inputs do not include '{column}'")
+        columns = self.input_columns + list(derived)
+
+        dtype = np.result_type(fault_loader.schema.dtype, rul_loader.schema.dtype)
+        # What uploads must provide, and the shared array both models read
+        boolean = fault_loader.schema.boolean | rul_loader.schema.boolean
+        self.schema = InputSchema(self.input_columns, dtype, boolean=boolean)
+        self._shared = InputSchema(columns, dtype)
+        self._fault_count = len(fault_columns)
+        self._rul_index = [columns.index(c) for c in rul_columns]
+        self._code = columns.index(FAULT_CODE)
+        self._product = columns.index(PRODUCT)
+        self._factors = [columns.index(c) for c in PRODUCT_FACTORS]
+
+    def predict(self, df: pd.DataFrame | np.ndarray, probabilities: bool = False) -> Dict[str, Any]:
+        """
+        Predict fault codes, then RUL given those fault codes.
+
+        Returns:
+            Dict with per-row fault codes, RUL predictions and, when
+            requested, fault class probabilities
+        """
+        with metrics.stage("prepare", "landing_gear_fault"):
+            X = self._shared.empty(len(df))
+            self.schema.to_array(df, X[:, :len(self.input_columns)])
+
+        with metrics.bind("landing_gear_fault"):
+            fault = self.fault_loader.predict(X[:, :self._fault_count], probabilities=probabilities)
+
+        with metrics.bind("landing_gear_rul"):
+            with metrics.stage("prepare"):
+                X[:, self._code] = fault["predictions"]
+                X[:, self._product] = X[:, self._factors[0]] * X[:, self._factors[1]]
+            rul = self.rul_loader.predict(X[:, self._rul_index])
+
+        return {
+            "predictions": fault["predictions"],
+            "rul": rul["predictions"],
+            "unit": rul["unit"],
+            "probabilities": fault["probabilities"],
+        }
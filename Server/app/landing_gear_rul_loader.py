@@ -13,6 +13,9 @@ import logging
 import numpy as np
 import pandas as pd
 
+from .input_schema import InputSchema, compile_schema, unnamed_features
+from .metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +28,7 @@ class LandingGearRULLoader:
         self.model = None
         self.scaler = None
         self.feature_names = None
+        self.schema: InputSchema | None = None
         
     def load(self) -> None:
         """Load the landing gear RUL model."""
@@ -42,28 +46,27 @@ class LandingGearRULLoader:
                 self.model = loaded
                 self.pipeline = {"model": loaded}
             
+            self.schema = compile_schema(self.model, self.feature_names)
+            self.feature_names = list(self.schema.columns)
+            
             logger.info(f"✅ Loaded landing gear RUL model from {self.model_path}")
         except Exception as e:
             logger.error(f"❌ Failed to load landing gear RUL model: {e}")
             raise
     
-    def prepare_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_data(self, df: pd.DataFrame | np.ndarray) -> np.ndarray:
         """
         Prepare CSV data for prediction.
-        Ensures correct feature order and types.
+        Validates the columns against the model's input schema and converts
+        them, in training order, into one contiguous array.
         """
         try:
-            if self.feature_names:
-                missing = set(self.feature_names) - set(df.columns)
-                if missing:
-                    raise ValueError(f"Missing columns: {sorted(missing)}")
-                return df[self.feature_names]
-            return df
+            return self.schema.to_array(df)
         except Exception as e:
             logger.error(f"❌ Data preparation failed: {e}")
             raise
     
-    def predict(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def predict(self, df: pd.DataFrame | np.ndarray) -> Dict[str, Any]:
         """
         Make predictions on the provided data.
         Predicts remaining useful life in cycles/hours.
@@ -74,10 +77,12 @@ class LandingGearRULLoader:
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        df_prepared = self.prepare_data(df)
+        with metrics.stage("prepare"):
+            X = self.prepare_data(df)
         
         try:
-            predictions = self.model.predict(df_prepared)
+            with metrics.stage("predict"), unnamed_features():
+                predictions = self.model.predict(X)
             
             result = {
                 "predictions": [float(p) for p in predictions],
@@ -1,28 +1,60 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import gc
+import hmac
 import io
-import numpy as np
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, List, Tuple
 import logging
 
 import pandas as pd
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Header, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-from .engine_maintenance_loader import EngineMaintenanceLoader
-from .landing_gear_fault_loader import LandingGearFaultLoader
-from .landing_gear_rul_loader import LandingGearRULLoader
-from .durability_loader import DurabilityLoader
-from .remaining_useful_life_loader import RemainingUsefulLifeLoader
+from .landing_gear_pipeline import LandingGearPipeline
+from .batching import MicroBatcher
+from .inference_executor import InferenceQueueFull
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from .model_registry import ModelLoadError
+from .model_watcher import ModelWatcher
+from .prediction_cache import PredictionCache
+from .response_stream import NDJSON_MEDIA_TYPE, NDJSONStream
+from .results import result_columns, result_items, result_metadata, shape_for, summarize_result
+from .serving import (
+    CLASSIFIER_MODELS,
+    MODEL_DIR,
+    MODEL_SPECS,
+    ROW_WISE_MODELS,
+    SAMPLE_DIR,
+    check_upload_format,
+    csv_column_types,
+    executor,
+    get_loader,
+    parse_and_predict_fleet,
+    read_upload,
+    record_error,
+    record_request,
+    registry,
+    upload_frames,
+)
+from . import batching
+from . import jobs_router
+from . import response_formats
+from . import telemetry_router
+from . import upload_formats
+from . import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-BASE_DIR = Path(__file__).resolve().parents[1]
-MODEL_DIR = (BASE_DIR.parent / "Model").resolve()
-
 app = FastAPI(title="AAI Risk Analysis API", version="1.0.0")
 
 origins = [
@@ -38,71 +70,143 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.include_router(jobs_router.router)
+app.include_router(telemetry_router.router)
 
-# Initialize model loaders
-models = {}
+# Responses up to these sizes are rendered and compressed on the event loop,
+# larger ones on a worker thread so they do not hold up other requests
+INLINE_RENDER_ROWS = 1_000
+INLINE_COMPRESS_BYTES = 64 * 1024
 
-def initialize_loaders() -> None:
-    """Initialize all model loaders."""
-    global models
-    models.clear()
-    
-    # Engine Maintenance Model
-    try:
-        engine_path = MODEL_DIR / "engine_maintenance_pipeline.pkl"
-        if engine_path.exists():
-            loader = EngineMaintenanceLoader(engine_path)
-            loader.load()
-            models["engine_maintenance"] = loader
-            logger.info("✅ Engine Maintenance model initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Engine Maintenance model: {e}")
-    
-    # Landing Gear Fault Model
-    try:
-        fault_path = MODEL_DIR / "LandingGearFaultPrediction.pkl"
-        if fault_path.exists():
-            loader = LandingGearFaultLoader(fault_path)
-            loader.load()
-            models["landing_gear_fault"] = loader
-            logger.info("✅ Landing Gear Fault model initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Landing Gear Fault model: {e}")
-    
-    # Landing Gear RUL Model
-    try:
-        rul_path = MODEL_DIR / "LandingGearRUL.pkl"
-        if rul_path.exists():
-            loader = LandingGearRULLoader(rul_path)
-            loader.load()
-            models["landing_gear_rul"] = loader
-            logger.info("✅ Landing Gear RUL model initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Landing Gear RUL model: {e}")
-    
-    # Durability Model
-    try:
-        durability_path = MODEL_DIR / "durability.pkl"
-        if durability_path.exists():
-            loader = DurabilityLoader(durability_path)
-            loader.load()
-            models["durability"] = loader
-            logger.info("✅ Durability model initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Durability model: {e}")
-    
-    # Remaining Useful Life LSTM Model
+# Columnar bodies the prediction endpoints return instead of JSON on request
+COLUMNAR_RESPONSES = {
+    200: {
+        "content": {
+            response_formats.MEDIA_TYPES[fmt]: {}
+            for fmt in response_formats.FORMATS
+            if fmt != response_formats.JSON
+        }
+    }
+}
+
+# Responses for repeated uploads of the same file
+prediction_cache = PredictionCache(
+    max_bytes=config.PREDICTION_CACHE_MAX_BYTES,
+    ttl_seconds=config.PREDICTION_CACHE_TTL,
+)
+
+# Small concurrent requests for these models are coalesced into one inference call
+BATCH_FUNCTIONS = {
+    "landing_gear_fault": batching.predict_rows,
+    "landing_gear_rul": batching.predict_rows,
+    "durability": batching.predict_rows,
+    "remaining_useful_life": batching.predict_sequences,
+}
+batchers = {
+    name: MicroBatcher(
+        name,
+        executor,
+        run_batch,
+        max_rows=config.BATCH_MAX_ROWS,
+        max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    )
+    for name, run_batch in BATCH_FUNCTIONS.items()
+    if name in config.BATCH_MODELS or "all" in config.BATCH_MODELS
+}
+
+# Sample inputs used to warm up a reloaded model before it serves requests
+WARMUP_SAMPLES = {
+    "engine_maintenance": "engine_maintenance_new_SD.csv",
+    "landing_gear_fault": "LandingGearFaultPrediction_sample.csv",
+    "landing_gear_rul": "LandingGearRUL_sample.csv",
+    "durability": "durability_sample.csv",
+    "remaining_useful_life": "remainingUsefulLife_lstm_sequence.csv",
+}
+
+# TensorFlow starts runtime threads when a model loads and is not fork-safe,
+# so the LSTM is always loaded inside each worker process
+FORK_UNSAFE_MODELS = {"remaining_useful_life"}
+
+
+def preload_names(preload: List[str] | None) -> List[str]:
+    if preload is None:
+        preload = config.PRELOAD_MODELS
+    if "all" in preload:
+        preload = registry.names()
+    return list(preload)
+
+
+def initialize_loaders(preload: List[str] | None = None) -> None:
+    """
+    Register the available models and start preloading the configured ones.
+    Other models are loaded on their first request. Models already loaded
+    before a fork (see preload_before_fork) are kept.
+    """
+    registry.refresh(keep_loaded=True)
+    preload = [name for name in preload_names(preload) if registry.loaded(name) is None]
+    registry.preload(preload)
+    logger.info(f"📊 Models available: {len(registry.names())}, preloading: {len(preload)}")
+
+
+def warm_up(model_name: str, loader: Any) -> None:
+    """Score the model's sample CSV once; raises if the new version cannot serve it."""
+    sample = SAMPLE_DIR / WARMUP_SAMPLES.get(model_name, "")
+    if not sample.is_file():
+        logger.warning(f"⚠️ No warm-up sample for {model_name}, reloading without warm-up")
+        return
+    with sample.open("rb") as f:
+        for frame in upload_formats.read_frames(
+            f, upload_formats.CSV, column_types=csv_column_types(model_name, loader)
+        ):
+            loader.predict(frame)
+
+
+def reload_model(model_name: str) -> Any:
+    """
+    Load, warm up and swap in a new version of a model, then drop its cached
+    responses. Blocks; in-flight requests finish on the previous version.
+    """
     try:
-        lstm_path = MODEL_DIR / "remainingUsefulLife_lstm.keras"
-        if lstm_path.exists():
-            loader = RemainingUsefulLifeLoader(lstm_path)
-            loader.load()
-            models["remaining_useful_life"] = loader
-            logger.info("✅ Remaining Useful Life LSTM model initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Remaining Useful Life model: {e}")
-    
-    logger.info(f"📊 Total models loaded: {len(models)}")
+        loader = registry.reload(model_name, warmup=warm_up)
+    except ModelLoadError:
+        metrics.inc("model_reloads_total", model=model_name, result="failed")
+        raise
+    prediction_cache.invalidate(model_name)
+    metrics.inc("model_reloads_total", model=model_name, result="ok")
+    return loader
+
+
+def reload_changed_model(path: Path) -> str | None:
+    spec = registry.spec_for_path(path)
+    return spec.name if spec is not None else None
+
+
+model_watcher = ModelWatcher(MODEL_DIR, reload_changed_model, reload_model)
+
+
+def preload_before_fork(preload: List[str] | None = None) -> List[str]:
+    """
+    Load models in the parent of a pre-forking server (gunicorn with
+    preload_app) so every worker shares their memory copy-on-write.
+    Models load one after another on this thread, since threads do not
+    survive a fork. The garbage collector is then frozen: collections in
+    the workers would otherwise write to every tracked object and copy the
+    pages holding the models into each worker.
+    """
+    registry.refresh()
+    loaded = []
+    for name in preload_names(preload):
+        if name in FORK_UNSAFE_MODELS or name not in registry:
+            continue
+        try:
+            registry.get(name)
+            loaded.append(name)
+        except ModelLoadError:
+            pass
+    gc.collect()
+    gc.freeze()
+    logger.info(f"♻️ Preloaded {len(loaded)} models before fork, {gc.get_freeze_count()} objects frozen")
+    return loaded
 
 
 class PredictionResponse(BaseModel):
@@ -113,9 +217,61 @@ class PredictionResponse(BaseModel):
     risk_level: str | None = None
 
 
+class MultiPredictionResponse(BaseModel):
+    models: List[str]
+    rows: int
+    results: Dict[str, PredictionResponse]
+    errors: Dict[str, str]
+    timings: Dict[str, Dict[str, float]]
+    summary: str
+
+
+class FleetPredictionResponse(BaseModel):
+    model: str
+    rows: int
+    units: List[Dict[str, Any]]
+    skipped_units: List[Any]
+    summary: str
+
+
 @app.on_event("startup")
 def load_models() -> None:
     initialize_loaders()
+    if config.MODEL_WATCH:
+        model_watcher.start()
+    jobs_router.job_runner.start()
+
+
+@app.on_event("shutdown")
+def stop_executor() -> None:
+    model_watcher.stop()
+    jobs_router.job_runner.shutdown()
+    executor.shutdown()
+
+
+def check_admin_token(token: str | None) -> None:
+    if config.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them.")
+    if token is None or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+@app.post("/admin/reload/{model_name}")
+async def reload_model_endpoint(
+    model_name: str, x_admin_token: str | None = Header(None)
+) -> Dict[str, Any]:
+    """
+    Reload a model from its artifact without downtime. Requests keep being
+    served by the current version until the new one is loaded and warmed up.
+    """
+    check_admin_token(x_admin_token)
+    if not any(spec.name == model_name for spec in MODEL_SPECS):
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+    try:
+        await run_in_threadpool(reload_model, model_name)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=422, detail=f"{e}. The previous version is still serving.")
+    return {"model": model_name, **registry.status()[model_name]}
 
 
 @app.get("/health")
@@ -124,93 +280,544 @@ def health() -> Dict[str, str]:
 
 
 @app.get("/models")
-def list_models() -> Dict[str, List[str]]:
-    return {"models": sorted(models.keys())}
+def list_models() -> Dict[str, Any]:
+    return {"models": registry.names(), "status": registry.status()}
 
 
-def compute_risk_level(preds: List[int]) -> str:
-    if not preds:
-        return "Unknown"
+@app.get("/cache")
+def cache_stats() -> Dict[str, Any]:
+    return prediction_cache.stats()
 
-    avg_code = sum(preds) / len(preds)
 
-    from collections import Counter
-    most_common_code, _ = Counter(preds).most_common(1)[0]
+@app.get("/batching")
+def batching_stats() -> Dict[str, Any]:
+    return {name: batcher.stats() for name, batcher in batchers.items()}
 
-    # You can tune thresholds based on domain meaning
-    if most_common_code == 0 and avg_code < 0.5:
-        return "Low Risk"
-    elif avg_code < 2:
-        return "Medium Risk"
-    else:
-        return "High Risk"
 
+@app.get("/metrics")
+def metrics_endpoint() -> Response:
+    """Prometheus text exposition of request, stage, model and cache metrics."""
+    for name, status in registry.status().items():
+        metrics.set("model_ready", 1 if status["state"] == "ready" else 0, model=name)
+        if status["load_seconds"] is not None:
+            metrics.set("model_load_seconds", status["load_seconds"], model=name)
+    for name, lane in executor.stats().items():
+        metrics.set("inference_pending", lane["pending"], model=name)
+    cache = prediction_cache.stats()
+    metrics.set("cache_hits_total", cache["hits"])
+    metrics.set("cache_misses_total", cache["misses"])
+    metrics.set("cache_bytes", cache["bytes"])
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
-@app.post("/predict/{model_name}", response_model=PredictionResponse)
-async def predict(model_name: str, file: UploadFile = File(...)) -> PredictionResponse:
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are allowed.")
 
-    # Get the loader
-    loader = models.get(model_name)
-    if loader is None:
-        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+def merge_results(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk loader results: list fields are concatenated in order."""
+    merged = dict(parts[0])
+    for key, value in merged.items():
+        if isinstance(value, list):
+            merged[key] = [item for part in parts for item in part[key]]
+    return merged
+
 
-    # Read CSV
-    df = pd.read_csv(io.BytesIO(await file.read()))
+def parse_and_predict(
+    model_name: str,
+    loader: Any,
+    predict_fn: Any,
+    source: BinaryIO,
+    fmt: str,
+    chunk_rows: int | None = None,
+) -> tuple[int, Dict[str, Any]]:
+    """
+    Parse the upload and run the predict function. Runs on an inference worker.
+    With chunk_rows, the upload is read and scored chunk by chunk so only one
+    chunk of rows is held as a DataFrame at a time.
+    """
+    rows = 0
+    parts = []
+    # Closed here, while the upload is still open, even if predict_fn fails
+    with contextlib.closing(upload_frames(model_name, loader, source, fmt, chunk_rows)) as frames:
+        for frame in frames:
+            rows += len(frame)
+            parts.append(predict_fn(frame))
+    if not parts:
+        raise ValueError("Upload contains no rows")
+    if len(parts) == 1:
+        return rows, parts[0]
+    return rows, merge_results(parts)
 
+
+def produce_prediction_lines(
+    model_name: str,
+    loader: Any,
+    predict_fn: Any,
+    source: BinaryIO,
+    fmt: str,
+    chunk_rows: int | None,
+    trajectory: bool,
+    emit: Any,
+) -> None:
+    """
+    Parse and score the upload, emitting one NDJSON record per batch.
+    Batch records hold plain arrays (fault codes or RUL values) with the row
+    offset of the batch, followed by a final summary record.
+    Runs on an inference worker.
+    """
+    reader = None
     try:
-        # Call predict based on model type
-        result = loader.predict(df)
-        
-        # Handle different response formats based on model type
-        if model_name == "engine_maintenance":
-            # Engine maintenance returns single prediction with label
-            preds_list = [result["prediction"]]
-            summary = f"Prediction: {result['label']}"
-            results = [{
-                "fault_code": result["prediction"],
-                "fault_name": result["label"]
-            }]
-            risk_level = compute_risk_level(preds_list)
-        
-        elif model_name in ["landing_gear_fault", "durability"]:
-            # These return multiple predictions
-            preds_list = result["predictions"]
-            results = [
-                {
-                    "fault_code": code,
-                    "fault_name": f"Fault Code {code}"
-                }
-                for code in preds_list
-            ]
-            summary = f"Generated {len(results)} predictions using '{model_name}'."
-            risk_level = compute_risk_level(preds_list)
-        
-        elif model_name in ["landing_gear_rul", "remaining_useful_life"]:
-            # These return numeric RUL predictions
-            preds_list = [int(p) for p in result["predictions"]]
-            results = [
-                {
-                    "rul": float(p),
-                    "unit": result.get("unit", "cycles")
-                }
-                for p in result["predictions"]
-            ]
-            summary = f"Generated {len(results)} RUL predictions using '{model_name}'."
-            risk_level = None  # RUL doesn't have risk levels
-        
-        else:
-            raise ValueError(f"Unknown model type: {model_name}")
-        
-        return PredictionResponse(
+        emit({"model": model_name})
+        reader = upload_frames(model_name, loader, source, fmt, chunk_rows)
+
+        shape = shape_for(model_name, trajectory)
+        rows = 0
+        counts: Counter = Counter()
+        latest_label = None
+        for chunk in reader:
+            result = predict_fn(chunk)
+            record: Dict[str, Any] = {"offset": rows, **shape.columns(result)}
+            unit = shape.unit(result)
+            if unit is not None:
+                record["unit"] = unit
+            probabilities = shape.probabilities(result)
+            if probabilities is not None:
+                record["probabilities"] = probabilities
+            counts.update(shape.codes(result))
+            if shape.latest_label(result) is not None:
+                latest_label = shape.latest_label(result)
+            rows += len(chunk)
+            emit(record)
+
+        summary, risk_level = shape.stream_summary(model_name, rows, counts, latest_label)
+        emit({"rows": rows, "summary": summary, "risk_level": risk_level})
+    finally:
+        if reader is not None:
+            reader.close()
+        source.close()
+
+
+def detach_upload(file: UploadFile) -> BinaryIO:
+    """
+    Take ownership of the spooled upload file.
+    FastAPI closes uploads as soon as the endpoint returns, which is before a
+    StreamingResponse body runs, so the stream keeps the file and closes it itself.
+    """
+    source = file.file
+    file.file = io.BytesIO()
+    return source
+
+
+async def predict_batched(
+    batcher: MicroBatcher, model_name: str, loader: Any, source: BinaryIO, fmt: str
+) -> tuple[int, Dict[str, Any]]:
+    """
+    Parse a small upload, then score it together with other concurrent
+    requests for the same model.
+    """
+    frame = await executor.run(model_name, read_upload, model_name, loader, source, fmt)
+    rows = len(frame)
+    if rows > batcher.max_rows:
+        return rows, await executor.run(model_name, loader.predict, frame)
+    return rows, await batcher.submit(loader, frame, rows)
+
+
+async def hash_upload(model_name: str, file: UploadFile) -> str | None:
+    """Hash the spooled upload for the prediction cache, when it is enabled."""
+    if not prediction_cache.enabled:
+        return None
+    try:
+        with metrics.stage("hash", model_name):
+            return await executor.run(model_name, prediction_cache.file_hash, file.file)
+    except InferenceQueueFull as e:
+        record_error(model_name, e)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def render_prediction(
+    model_name: str, rows: int, result: Dict[str, Any], response_format: str, trajectory: bool = False
+) -> bytes:
+    """
+    Response body of one model's loader result. JSON is rendered once by
+    pydantic here rather than validated and encoded again by FastAPI.
+    """
+    if response_format == response_formats.JSON:
+        summary, risk_level = summarize_result(model_name, result, trajectory)
+        response = PredictionResponse(
             model=model_name,
-            rows=len(df),
-            prediction=results,
+            rows=rows,
+            prediction=result_items(model_name, result, trajectory),
             summary=summary,
             risk_level=risk_level,
         )
+        return response.model_dump_json().encode()
+
+    return response_formats.encode(
+        response_format,
+        result_columns(model_name, result, trajectory),
+        result_metadata(model_name, rows, result, trajectory),
+    )
+
+
+def check_result_format(result_format: str | None, accept: str | None) -> str:
+    """Response format from ?result_format= or else the Accept header, or a 400/406 error."""
+    if result_format is None:
+        return response_formats.negotiate(accept)
+    fmt = result_format.strip().lower()
+    if fmt not in response_formats.FORMATS:
+        allowed = ", ".join(response_formats.FORMATS)
+        raise HTTPException(status_code=400, detail=f"Unsupported result_format '{result_format}'. Allowed: {allowed}")
+    if not response_formats.format_available(fmt):
+        raise HTTPException(status_code=406, detail=f"Responses in {fmt} format are not available on this server.")
+    return fmt
+
+
+async def off_loop(inline: bool, func: Any, *args: Any) -> Any:
+    """Call func on the event loop when it is cheap, otherwise on a worker thread."""
+    if inline:
+        return func(*args)
+    return await run_in_threadpool(func, *args)
+
+
+async def prediction_response(
+    model_name: str, body: bytes, response_format: str, accept_encoding: str | None
+) -> Response:
+    """
+    Response for a rendered body. JSON bodies of at least
+    RESPONSE_COMPRESSION_MIN_BYTES are compressed with the client's
+    preferred encoding among RESPONSE_ENCODINGS.
+    """
+    encoding = None
+    if response_format in response_formats.COMPRESSIBLE and len(body) >= config.RESPONSE_COMPRESSION_MIN_BYTES:
+        encoding = response_formats.choose_encoding(accept_encoding, config.RESPONSE_ENCODINGS)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        with metrics.stage("compress", model_name):
+            body = await off_loop(len(body) <= INLINE_COMPRESS_BYTES, response_formats.compress, body, encoding)
+        headers["Content-Encoding"] = encoding
+    metrics.observe(
+        "response_bytes", len(body), model=model_name, format=response_format, encoding=encoding or "identity"
+    )
+    return Response(body, media_type=response_formats.MEDIA_TYPES[response_format], headers=headers)
+
+
+# Registered before /predict/{model_name}, which would take it as a model name
+@app.post("/predict/landing_gear", response_model=PredictionResponse, responses=COLUMNAR_RESPONSES)
+async def predict_landing_gear(
+    file: UploadFile = File(...),
+    probabilities: bool = Query(False, description="Include fault class probabilities for every prediction"),
+    result_format: str | None = Query(None, description="json, arrow, parquet or msgpack; by default from the Accept header"),
+    accept: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+) -> PredictionResponse:
+    """
+    Landing gear fault and RUL in one pass: the upload (the fault model's
+    inputs) is parsed once, the predicted fault codes and the derived
+    Stiffness_Damping_Product are fed to the RUL model, and every row gets
+    both results.
+    """
+    fmt = check_upload_format(file)
+    response_format = check_result_format(result_format, accept)
+    started = time.perf_counter()
+    fault_loader = await get_loader("landing_gear_fault")
+    rul_loader = await get_loader("landing_gear_rul")
+
+    try:
+        pipeline = LandingGearPipeline(fault_loader, rul_loader)
+        predict_fn = functools.partial(pipeline.predict, probabilities=probabilities)
+        rows, result = await executor.run(
+            "landing_gear_fault", parse_and_predict,
+            "landing_gear_fault", pipeline, predict_fn, file.file, fmt, config.CSV_CHUNK_ROWS,
+        )
+        serialize_started = time.perf_counter()
+        body = await off_loop(
+            len(result["predictions"]) <= INLINE_RENDER_ROWS,
+            render_prediction, "landing_gear", rows, result, response_format,
+        )
+        metrics.observe("stage_seconds", time.perf_counter() - serialize_started, model="landing_gear", stage="serialize")
+        response = await prediction_response("landing_gear", body, response_format, accept_encoding)
+        record_request("landing_gear", "ok", started, rows)
+        return response
+    except InferenceQueueFull as e:
+        record_error("landing_gear", e)
+        record_request("landing_gear", "error", started)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"❌ Landing gear prediction failed: {e}")
+        record_error("landing_gear", e)
+        record_request("landing_gear", "error", started)
+        raise HTTPException(status_code=422, detail=f"Prediction failed: {str(e)}")
+
+
+@app.post("/predict/{model_name}", response_model=PredictionResponse, responses=COLUMNAR_RESPONSES)
+async def predict(
+    model_name: str,
+    file: UploadFile = File(...),
+    trajectory: bool = Query(False, description="engine_maintenance: score every window instead of only the latest"),
+    stride: int = Query(1, ge=1, description="With trajectory, score every stride-th window"),
+    stream: bool = Query(False, description="Stream NDJSON records as each batch is scored"),
+    probabilities: bool = Query(False, description="Classifiers: include class probabilities for every prediction"),
+    result_format: str | None = Query(None, description="json, arrow, parquet or msgpack; by default from the Accept header"),
+    accept: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+) -> PredictionResponse:
+    fmt = check_upload_format(file)
+    if stream and result_format is not None:
+        raise HTTPException(status_code=400, detail="stream=true always returns NDJSON; drop result_format.")
+    response_format = check_result_format(result_format, accept)
+
+    if model_name not in registry:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+
+    started = time.perf_counter()
+    if file.size is not None:
+        metrics.observe("payload_bytes", file.size, model=model_name)
+
+    use_trajectory = trajectory and model_name == "engine_maintenance"
+    with_probabilities = probabilities and model_name in CLASSIFIER_MODELS
+    chunk_rows = config.CSV_CHUNK_ROWS if model_name in ROW_WISE_MODELS else None
+
+    if not stream:
+        # Serve repeated uploads from the cache, without loading the model.
+        # Starlette spools the multipart body to a temporary file, which is
+        # hashed and parsed in place.
+        digest = await hash_upload(model_name, file)
+        variant = (fmt, "trajectory", stride) if use_trajectory else (fmt, "predict")
+        variant += (with_probabilities, response_format)
+        cached = prediction_cache.get(model_name, registry.serial(model_name), digest, variant)
+        if cached is not None:
+            response = await prediction_response(model_name, cached, response_format, accept_encoding)
+            record_request(model_name, "cached", started)
+            return response
+
+    # Get the loader
+    loader = await get_loader(model_name)
+    if use_trajectory:
+        predict_fn = functools.partial(loader.predict_windows, stride=stride, probabilities=with_probabilities)
+    elif with_probabilities:
+        predict_fn = functools.partial(loader.predict, probabilities=True)
+    else:
+        predict_fn = loader.predict
+
+    if stream:
+        ndjson = NDJSONStream()
+        source = detach_upload(file)
+        try:
+            executor.submit(
+                model_name, ndjson.run, produce_prediction_lines,
+                model_name, loader, predict_fn, source, fmt, chunk_rows, use_trajectory,
+            )
+        except InferenceQueueFull as e:
+            source.close()
+            record_error(model_name, e)
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        metrics.inc("requests_total", model=model_name, outcome="stream")
+        return StreamingResponse(ndjson.iterate(), media_type=NDJSON_MEDIA_TYPE)
+
+    batcher = batchers.get(model_name)
+    small_upload = file.size is not None and file.size <= config.BATCH_MAX_UPLOAD_BYTES
+
+    try:
+        if batcher is not None and small_upload and not use_trajectory and not with_probabilities:
+            rows, result = await predict_batched(batcher, model_name, loader, file.file, fmt)
+        else:
+            # Parse the upload and call predict on the model's worker lane
+            rows, result = await executor.run(
+                model_name, parse_and_predict, model_name, loader, predict_fn, file.file, fmt, chunk_rows
+            )
+        serialize_started = time.perf_counter()
+        body = await off_loop(
+            len(result.get("predictions", ())) <= INLINE_RENDER_ROWS,
+            render_prediction, model_name, rows, result, response_format, use_trajectory,
+        )
+        metrics.observe("stage_seconds", time.perf_counter() - serialize_started, model=model_name, stage="serialize")
+        # Cached uncompressed, so one entry serves every Accept-Encoding, and
+        # under the loader that produced it, which a reload may have replaced
+        version = registry.serial(model_name, loader)
+        prediction_cache.put(model_name, version, digest, variant, body, len(body))
+        response = await prediction_response(model_name, body, response_format, accept_encoding)
+        record_request(model_name, "ok", started, rows)
+        return response
     
+    except InferenceQueueFull as e:
+        record_error(model_name, e)
+        record_request(model_name, "error", started)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"❌ Prediction failed for {model_name}: {e}")
+        record_error(model_name, e)
+        record_request(model_name, "error", started)
         raise HTTPException(status_code=422, detail=f"Prediction failed: {str(e)}")
+
+
+@app.post("/predict/remaining_useful_life/fleet", response_model=FleetPredictionResponse)
+async def predict_fleet(file: UploadFile = File(...)) -> FleetPredictionResponse:
+    """
+    Score many engines from one upload.
+    Accepts a table with a UnitNumber column (CSV, Parquet or Arrow) or a
+    raw CMAPSS .txt file.
+    """
+    fmt = check_upload_format(file, cmapss=True)
+    if fmt in (upload_formats.NPY, upload_formats.NPZ):
+        raise HTTPException(status_code=400, detail="Fleet uploads need a UnitNumber column; NumPy arrays are not accepted.")
+
+    model_name = "remaining_useful_life"
+    if model_name not in registry:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+
+    started = time.perf_counter()
+    if file.size is not None:
+        metrics.observe("payload_bytes", file.size, model=model_name)
+
+    digest = await hash_upload(model_name, file)
+    variant = (fmt, "fleet")
+    cached = prediction_cache.get(model_name, registry.serial(model_name), digest, variant)
+    if cached is not None:
+        record_request(model_name, "cached", started)
+        return cached
+
+    loader = await get_loader(model_name)
+
+    try:
+        rows, result = await executor.run(
+            model_name, parse_and_predict_fleet, loader, file.file, fmt
+        )
+        summary = (
+            f"Generated {result['sequences_used']} RUL predictions "
+            f"for {len(result['units'])} units using '{model_name}'."
+        )
+        response = FleetPredictionResponse(
+            model=model_name,
+            rows=rows,
+            units=result["units"],
+            skipped_units=result["skipped_units"],
+            summary=summary,
+        )
+        prediction_cache.put(
+            model_name, registry.serial(model_name, loader), digest, variant,
+            response, len(response.model_dump_json()),
+        )
+        record_request(model_name, "ok", started, rows)
+        return response
+
+    except InferenceQueueFull as e:
+        record_error(model_name, e)
+        record_request(model_name, "error", started)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"❌ Fleet prediction failed: {e}")
+        record_error(model_name, e)
+        record_request(model_name, "error", started)
+        raise HTTPException(status_code=422, detail=f"Prediction failed: {str(e)}")
+
+
+# Metrics label of fan-out requests; per-model work is labelled by model
+FAN_OUT = "fan_out"
+
+
+def read_shared_upload(source: BinaryIO, fmt: str, column_types: Dict[str, str] | None = None) -> pd.DataFrame:
+    """Parse a whole tabular upload once, for every model of a fan-out request."""
+    with metrics.stage("parse", FAN_OUT):
+        frame = next(upload_formats.read_frames(source, fmt, column_types=column_types), None)
+    if frame is None or len(frame) == 0:
+        raise ValueError("Upload contains no rows")
+    return frame
+
+
+def timed_call(func: Any, *args: Any) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+@app.post("/predict", response_model=MultiPredictionResponse)
+async def predict_many(
+    models: str = Query(..., description="Comma separated model names, e.g. landing_gear_fault,durability"),
+    file: UploadFile = File(...),
+    probabilities: bool = Query(False, description="Classifiers: include class probabilities for every prediction"),
+) -> MultiPredictionResponse:
+    """
+    Score one upload with several models at once.
+    The upload is parsed once into a DataFrame that every model reads
+    without modifying it, and each model runs on its own worker lane, so
+    the request takes about as long as its slowest model. A model that
+    fails is reported under errors while the others still return results.
+    """
+    fmt = check_upload_format(file)
+    if fmt in (upload_formats.NPY, upload_formats.NPZ):
+        raise HTTPException(status_code=400, detail="Multi-model uploads need named columns; NumPy arrays are not accepted.")
+    names = list(dict.fromkeys(name.strip() for name in models.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="Select at least one model.")
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Models not found: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    if file.size is not None:
+        metrics.observe("payload_bytes", file.size, model=FAN_OUT)
+
+    errors: Dict[str, str] = {}
+    loaders: Dict[str, Any] = {}
+    for name, loader in zip(names, await asyncio.gather(*(get_loader(name) for name in names), return_exceptions=True)):
+        if isinstance(loader, HTTPException):
+            errors[name] = loader.detail
+        elif isinstance(loader, Exception):
+            raise loader
+        else:
+            loaders[name] = loader
+
+    try:
+        column_types: Dict[str, str] = {}
+        for name, loader in loaders.items():
+            column_types.update(csv_column_types(name, loader) or {})
+        # Parsed on a lane of its own, admitted like any model's request
+        frame = await executor.run(FAN_OUT, read_shared_upload, file.file, fmt, column_types)
+    except InferenceQueueFull as e:
+        record_error(FAN_OUT, e)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"❌ Could not parse upload for {', '.join(names)}: {e}")
+        record_error(FAN_OUT, e)
+        raise HTTPException(status_code=422, detail=f"Could not parse upload: {str(e)}")
+    parse_seconds = time.perf_counter() - started
+
+    async def score(name: str, loader: Any) -> Tuple[Dict[str, Any], float, float]:
+        submitted = time.perf_counter()
+        predict_fn = loader.predict
+        if probabilities and name in CLASSIFIER_MODELS:
+            predict_fn = functools.partial(loader.predict, probabilities=True)
+        result, compute_seconds = await executor.run(name, timed_call, predict_fn, frame)
+        return result, compute_seconds, time.perf_counter() - submitted
+
+    outcomes = await asyncio.gather(
+        *(score(name, loader) for name, loader in loaders.items()), return_exceptions=True
+    )
+
+    results: Dict[str, PredictionResponse] = {}
+    timings: Dict[str, Dict[str, float]] = {"parse": {"seconds": parse_seconds}}
+    for name, outcome in zip(loaders, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"❌ Prediction failed for {name}: {outcome}")
+            record_error(name, outcome)
+            record_request(name, "error", started)
+            errors[name] = f"Prediction failed: {str(outcome)}"
+            continue
+        result, compute_seconds, seconds = outcome
+        summary, risk_level = summarize_result(name, result)
+        results[name] = PredictionResponse(
+            model=name, rows=len(frame), prediction=result_items(name, result), summary=summary, risk_level=risk_level
+        )
+        timings[name] = {"seconds": seconds, "compute_seconds": compute_seconds}
+        record_request(name, "ok", started, len(frame))
+
+    if not results:
+        raise HTTPException(status_code=422, detail={"errors": errors})
+    total = time.perf_counter() - started
+    timings["total"] = {"seconds": total}
+    metrics.observe("stage_seconds", total, model=FAN_OUT, stage="total")
+    return MultiPredictionResponse(
+        models=names,
+        rows=len(frame),
+        results=results,
+        errors=errors,
+        timings=timings,
+        summary=f"Scored {len(frame)} rows with {len(results)} of {len(names)} models.",
+    )
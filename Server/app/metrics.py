@@ -0,0 +1,213 @@
+"""
+Metrics
+In-process counters, gauges and histograms rendered in the Prometheus text
+exposition format, without the prometheus_client dependency.
+Stage timings (parse, prepare, predict, ...) are attributed to the model
+bound to the current worker thread, so loaders can time their own stages
+without knowing which model name they are served under.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+PREFIX = "aerisk_"
+
+# Seconds, from sub-millisecond sklearn calls up to long batch uploads
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+# Bytes, 1 KiB to 1 GiB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))
+# Rows per request
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class _Family:
+    def __init__(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = ()):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = buckets
+        self.samples: Dict[Labels, Any] = {}
+
+
+class MetricsRegistry:
+    """Thread-safe metric families keyed by name and label values."""
+
+    def __init__(self) -> None:
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Iterable[float] = ()) -> None:
+        """Declare a metric family. Histograms need their bucket upper bounds."""
+        with self._lock:
+            self._families[name] = _Family(name, kind, help_text, tuple(buckets))
+
+    def _family(self, name: str, kind: str) -> _Family:
+        family = self._families.get(name)
+        if family is None:
+            raise KeyError(f"Metric '{name}' is not declared")
+        if family.kind != kind:
+            raise ValueError(f"Metric '{name}' is a {family.kind}, not a {kind}")
+        return family
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._family(name, COUNTER)
+            family.samples[key] = family.samples.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge, or mirror a counter that is maintained elsewhere."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None or family.kind == HISTOGRAM:
+                self._family(name, GAUGE)
+            family.samples[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._family(name, HISTOGRAM)
+            histogram = family.samples.get(key)
+            if histogram is None:
+                histogram = family.samples[key] = _Histogram(family.buckets)
+            # Prometheus buckets are inclusive upper bounds
+            histogram.counts[bisect.bisect_left(family.buckets, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    @contextmanager
+    def bind(self, model_name: str) -> Iterator[None]:
+        """Attribute stage timings on this thread to model_name."""
+        previous = getattr(self._local, "model", None)
+        self._local.model = model_name
+        try:
+            yield
+        finally:
+            self._local.model = previous
+
+    def bound_model(self) -> str | None:
+        return getattr(self._local, "model", None)
+
+    @contextmanager
+    def stage(self, stage: str, model_name: str | None = None) -> Iterator[None]:
+        """
+        Time a block as one pipeline stage of a model (by default the model
+        bound to this thread). Unbound blocks are not recorded.
+        """
+        model_name = model_name or self.bound_model()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if model_name is not None:
+                self.observe("stage_seconds", time.perf_counter() - started, model=model_name, stage=stage)
+
+    def timed_iter(self, iterable: Iterable[Any], stage: str, model_name: str | None = None) -> Iterator[Any]:
+        """Yield from iterable, timing each step (e.g. parsing a chunk) as a stage."""
+        model_name = model_name or self.bound_model()
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = time.perf_counter()
+                item = next(iterator, _END)
+                if item is _END:
+                    return
+                if model_name is not None:
+                    self.observe("stage_seconds", time.perf_counter() - started, model=model_name, stage=stage)
+                yield item
+        finally:
+            # Release the source (e.g. a chunked CSV reader) as soon as iteration stops
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for family in self._families.values():
+                name = PREFIX + family.name
+                lines.append(f"# HELP {name} {family.help}")
+                lines.append(f"# TYPE {name} {family.kind}")
+                for labels, sample in family.samples.items():
+                    if family.kind != HISTOGRAM:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(sample)}")
+                        continue
+                    cumulative = 0
+                    bounds = [_format_value(b) for b in family.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, sample.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(labels + (("le", bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {sample.count}")
+        return "\n".join(lines) + "\n"
+
+
+_END = object()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Process-wide registry shared by the API and the model loaders
+metrics = MetricsRegistry()
+metrics.describe(
+    "stage_seconds", HISTOGRAM,
+    "Time spent per pipeline stage (hash, parse, prepare, predict, predict_proba, serialize, compress, total).",
+    LATENCY_BUCKETS,
+)
+metrics.describe("requests_total", COUNTER, "Prediction requests by outcome (ok, cached, error, stream, live).")
+metrics.describe("rows_total", COUNTER, "Input rows scored.")
+metrics.describe("request_rows", HISTOGRAM, "Input rows per request.", ROW_BUCKETS)
+metrics.describe("payload_bytes", HISTOGRAM, "Upload size per request.", SIZE_BUCKETS)
+metrics.describe("response_bytes", HISTOGRAM, "Response body size per request by format and encoding.", SIZE_BUCKETS)
+metrics.describe("errors_total", COUNTER, "Failed requests by exception type.")
+metrics.describe("model_load_seconds", GAUGE, "Time the last successful load of each model took.")
+metrics.describe("model_reloads_total", COUNTER, "Model reloads by result (ok, failed).")
+metrics.describe("model_ready", GAUGE, "1 when the model is loaded and serving, 0 otherwise.")
+metrics.describe("inference_pending", GAUGE, "Requests running or waiting on each model's worker lane.")
+metrics.describe("cache_hits_total", COUNTER, "Prediction cache hits.")
+metrics.describe("cache_misses_total", COUNTER, "Prediction cache misses.")
+metrics.describe("cache_bytes", GAUGE, "Bytes held by the prediction cache.")
@@ -0,0 +1,242 @@
+"""
+Model Registry
+Loads model artifacts on first use instead of all at startup.
+Selected models can be preloaded in parallel background threads, and every
+model reports its state (unloaded, loading, ready, failed) and load time.
+A ready model can be reloaded from its artifact: the new version is loaded
+and warmed up on the side, then swapped in while requests that already hold
+the old loader finish on it.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNLOADED = "unloaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """How to build the loader for one model artifact."""
+
+    name: str
+    filename: str
+    factory: Callable[[Path], Any]
+    label: str
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a model artifact could not be loaded."""
+
+
+class _Entry:
+    def __init__(self, spec: ModelSpec, path: Path):
+        self.spec = spec
+        self.path = path
+        self.state = UNLOADED
+        self.loader: Any = None
+        self.load_seconds: float | None = None
+        self.error: str | None = None
+        # Incremented on every successful load or reload
+        self.version = 0
+        # Registry-wide number of the current loader, never given to another one
+        self.serial: int | None = None
+        self.lock = threading.Lock()
+        # Serializes reloads without blocking readers of the current version
+        self.reload_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Lazily loaded model loaders keyed by model name."""
+
+    def __init__(self, model_dir: Path, specs: Iterable[ModelSpec]):
+        self.model_dir = Path(model_dir)
+        self._specs = list(specs)
+        self._entries: Dict[str, _Entry] = {}
+        # Ready loaders by name; shared with callers that only need loaded models
+        self.models: Dict[str, Any] = {}
+        self._serials = itertools.count(1)
+
+    def refresh(self, keep_loaded: bool = False) -> None:
+        """
+        Forget every loader and register the specs whose artifact exists.
+        With keep_loaded, models that are already ready are kept, e.g. the
+        ones a pre-forking server loaded in the parent process.
+        """
+        ready = {
+            name: entry for name, entry in self._entries.items() if entry.state == READY
+        } if keep_loaded else {}
+        self._entries.clear()
+        self.models.clear()
+        for spec in self._specs:
+            path = self.model_dir / spec.filename
+            if spec.name in ready and path.exists():
+                self._entries[spec.name] = ready[spec.name]
+                self.models[spec.name] = ready[spec.name].loader
+            elif path.exists():
+                self._entries[spec.name] = _Entry(spec, path)
+            else:
+                logger.warning(f"⚠️ {spec.label} model not found at {path}")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        """Models that can be served: artifact present and not failed."""
+        return sorted(name for name, entry in self._entries.items() if entry.state != FAILED)
+
+    def model_path(self, name: str) -> Path:
+        return self._entries[name].path
+
+    def spec_for_path(self, path: str | Path) -> ModelSpec | None:
+        """The spec whose artifact is, or contains, the given path."""
+        path = Path(path)
+        for spec in self._specs:
+            artifact = self.model_dir / spec.filename
+            if path == artifact or artifact in path.parents:
+                return spec
+        return None
+
+    def loaded(self, name: str) -> Any | None:
+        """The loader if it is ready, without triggering a load."""
+        return self.models.get(name)
+
+    def serial(self, name: str, loader: Any = None) -> int | None:
+        """
+        Number of the model's current loader, unique for the registry's
+        lifetime, or None if it is not loaded. Given the loader a result
+        came from, None unless that loader is still the current one.
+        """
+        entry = self._entries.get(name)
+        if entry is None or entry.state != READY:
+            return None
+        with entry.lock:
+            if loader is not None and loader is not entry.loader:
+                return None
+            return entry.serial
+
+    def get(self, name: str) -> Any:
+        """
+        Return the loader, loading it first if needed. Blocks while loading,
+        so call it from a worker thread. A failed model is retried on the next call.
+
+        Raises:
+            KeyError: if the model is unknown.
+            ModelLoadError: if loading fails.
+        """
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.loader
+
+        with entry.lock:
+            if entry.state == READY:
+                return entry.loader
+
+            entry.state = LOADING
+            entry.error = None
+            started = time.perf_counter()
+            try:
+                loader = entry.spec.factory(entry.path)
+                loader.load()
+            except Exception as e:
+                entry.state = FAILED
+                entry.error = str(e)
+                logger.error(f"❌ Failed to initialize {entry.spec.label} model: {e}")
+                raise ModelLoadError(f"Model '{name}' failed to load: {e}") from e
+
+            entry.load_seconds = time.perf_counter() - started
+            entry.loader = loader
+            entry.state = READY
+            entry.version += 1
+            entry.serial = next(self._serials)
+            self.models[name] = loader
+            logger.info(f"✅ {entry.spec.label} model initialized in {entry.load_seconds:.2f}s")
+            return loader
+
+    def reload(self, name: str, warmup: Callable[[str, Any], None] | None = None) -> Any:
+        """
+        Load a fresh copy of the model's artifact and swap it in.
+        The new loader is loaded and, if given, passed to warmup(name, loader)
+        before it replaces the current one, so requests never see a cold or
+        broken version. Callers holding the old loader keep using it.
+        Blocks, so call it from a worker thread.
+
+        Raises:
+            KeyError: if the model is unknown.
+            ModelLoadError: if loading or warm-up fails; the current version stays.
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            spec = next((s for s in self._specs if s.name == name), None)
+            if spec is None:
+                raise KeyError(name)
+            entry = self._entries.setdefault(name, _Entry(spec, self.model_dir / spec.filename))
+
+        with entry.reload_lock:
+            started = time.perf_counter()
+            try:
+                if not entry.path.exists():
+                    raise FileNotFoundError(f"{entry.path} not found")
+                loader = entry.spec.factory(entry.path)
+                loader.load()
+                if warmup is not None:
+                    warmup(name, loader)
+            except Exception as e:
+                logger.error(f"❌ Reload of {entry.spec.label} model failed, keeping the current version: {e}")
+                raise ModelLoadError(f"Model '{name}' failed to reload: {e}") from e
+
+            with entry.lock:
+                entry.load_seconds = time.perf_counter() - started
+                entry.loader = loader
+                entry.state = READY
+                entry.error = None
+                entry.version += 1
+                entry.serial = next(self._serials)
+                self.models[name] = loader
+            logger.info(
+                f"♻️ {entry.spec.label} model reloaded in {entry.load_seconds:.2f}s (version {entry.version})"
+            )
+            return loader
+
+    def preload(self, names: Iterable[str]) -> List[threading.Thread]:
+        """Start loading the given models in parallel background threads."""
+        threads = []
+        for name in names:
+            if name not in self._entries:
+                logger.warning(f"⚠️ Cannot preload unknown model '{name}'")
+                continue
+            thread = threading.Thread(
+                target=self._preload_one, args=(name,), name=f"preload-{name}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def _preload_one(self, name: str) -> None:
+        try:
+            self.get(name)
+        except ModelLoadError:
+            pass
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """State, load time and last error of every registered model."""
+        return {
+            name: {
+                "state": entry.state,
+                "load_seconds": entry.load_seconds,
+                "error": entry.error,
+                "version": entry.version,
+            }
+            for name, entry in sorted(self._entries.items())
+        }
@@ -0,0 +1,76 @@
+"""
+Model Watcher
+Watches MODEL_DIR for changed artifacts and reloads the affected models,
+so new versions can be rolled out by copying files without a restart.
+Write a new artifact under a temporary name and rename it into place, or
+the watcher may pick up a half-written file; a failed reload keeps the
+current version serving.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchfiles import watch
+except ImportError:
+    watch = None
+
+
+class ModelWatcher:
+    """Background thread turning file changes into model names to reload."""
+
+    def __init__(
+        self,
+        model_dir: Path,
+        resolve: Callable[[Path], str | None],
+        on_change: Callable[[str], None],
+        debounce_ms: int = 1600,
+    ):
+        self.model_dir = Path(model_dir)
+        self.resolve = resolve
+        self.on_change = on_change
+        self.debounce_ms = debounce_ms
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def available() -> bool:
+        return watch is not None
+
+    def start(self) -> bool:
+        """Start watching. Returns False if watchfiles is not installed."""
+        if watch is None:
+            logger.warning("⚠️ watchfiles not installed, model file watching is disabled")
+            return False
+        if self._thread is not None:
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"ℹ️ Watching {self.model_dir} for model updates")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        for changes in watch(self.model_dir, stop_event=self._stop, debounce=self.debounce_ms):
+            self._handle(path for _, path in changes)
+
+    def _handle(self, paths: Iterable[str]) -> None:
+        names = {self.resolve(Path(path)) for path in paths} - {None}
+        for name in sorted(names):
+            try:
+                self.on_change(name)
+            except Exception as e:
+                # Logged by the reload itself; keep watching
+                logger.debug(f"Reload of {name} after file change failed: {e}")
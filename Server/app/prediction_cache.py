@@ -0,0 +1,147 @@
+"""
+Prediction Cache
+Memory-bounded LRU cache of prediction responses.
+Entries are keyed by model name, the version of the loader that produced
+them and a hash of the uploaded bytes, so re-uploading the same file skips
+parsing and inference, and a response is never served by a newer model.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Hashable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """LRU cache with a byte budget, optional TTL and hit/miss counters."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Any, int, float]]" = OrderedDict()
+        # model name -> loader version the cached entries came from
+        self._versions: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def file_hash(source: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+        """Hash a file-like upload in chunks and rewind it."""
+        digest = hashlib.blake2b(digest_size=16)
+        source.seek(0)
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+        source.seek(0)
+        return digest.hexdigest()
+
+    def get(self, model_name: str, version: int | None, digest: str, variant: Hashable = "") -> Any | None:
+        """
+        Return the value cached for this loader version, or None on a miss.
+        A model that is not loaded (version None) has nothing to serve.
+        """
+        if not self.enabled:
+            return None
+        key = (model_name, version, digest, variant)
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(model_name, version) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(
+        self, model_name: str, version: int | None, digest: str, variant: Hashable, value: Any, size: int
+    ) -> None:
+        """
+        Store a value produced by the given loader version, evicting least
+        recently used entries to stay within budget. Values of a version
+        older than the model's latest (or None) are not stored.
+        """
+        if not self.enabled or size > self.max_bytes:
+            return
+        key = (model_name, version, digest, variant)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            if not self._check_version(model_name, version):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, model_name: str | None = None) -> None:
+        """Drop every entry, or only the entries of one model."""
+        with self._lock:
+            keys = [k for k in self._entries if model_name is None or k[0] == model_name]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            if model_name is None:
+                self._versions.clear()
+            else:
+                self._versions.pop(model_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _check_version(self, model_name: str, version: int | None) -> bool:
+        """
+        Drop a model's entries once a newer loader version shows up. False
+        for None or a version older than the latest one. Caller holds the lock.
+        """
+        if version is None:
+            return False
+        previous = self._versions.get(model_name)
+        if previous is not None and version < previous:
+            return False
+        if previous is not None and version != previous:
+            keys = [k for k in self._entries if k[0] == model_name]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            logger.info(f"♻️ New version of {model_name} loaded, dropped {len(keys)} cached predictions")
+        self._versions[model_name] = version
+        return True
+
+    def _remove(self, key: Tuple[Hashable, ...]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -5,35 +5,133 @@ Handles loading and inference for the RUL LSTM TensorFlow model.
 
 from __future__ import annotations
 
+import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, IO, Sequence, Tuple
 import logging
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .input_schema import InputSchema
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-try:
-    import tensorflow as tf
-except ImportError:
-    tf = None
-    logger.warning("TensorFlow not installed")
+# TensorFlow is imported on first load, so processes that never serve the
+# LSTM do not pay for its import time and memory
+_tf = None
+
+
+def _import_tensorflow() -> Any:
+    global _tf
+    if _tf is None:
+        try:
+            import tensorflow as tf
+        except ImportError:
+            raise ImportError("TensorFlow is required for LSTM model but is not installed")
+        _tf = tf
+    return _tf
+
+
+# Inference backends:
+#   keras    - Keras predict_on_batch
+#   function - tf.function with a fixed input signature, no Keras call overhead
+#   xla      - the same graph compiled with XLA; batches are padded to a power
+#              of two so only a few shapes are ever compiled
+BACKENDS = ("keras", "function", "xla")
+
+# CMAPSS layout (Model/dataset/CMAPSSData/*.txt): whitespace separated, no header
+UNIT_COLUMN = "UnitNumber"
+CYCLE_COLUMN = "Cycle"
+CMAPSS_COLUMNS = (
+    [UNIT_COLUMN, CYCLE_COLUMN]
+    + [f"OpSet{i}" for i in range(1, 4)]
+    + [f"Sensor{i}" for i in range(1, 22)]
+)
+# Columns the LSTM was trained on (constant channels dropped)
+FEATURE_COLUMNS = [
+    "OpSet1", "OpSet2",
+    "Sensor2", "Sensor3", "Sensor4", "Sensor7", "Sensor8", "Sensor9",
+    "Sensor11", "Sensor12", "Sensor13", "Sensor15", "Sensor17", "Sensor20", "Sensor21",
+]
+
+# Per-column min/max of the MinMaxScaler(feature_range=(-1, 1)) the LSTM was
+# trained behind, fitted on train_FD001 and written next to the model by
+# scripts/generate_sample_data.py
+SCALER_FILE = "remainingUsefulLife_scaler.json"
+
+
+def read_cmapss(source: IO[bytes]) -> pd.DataFrame:
+    """Read a whitespace separated CMAPSS file into named columns."""
+    df = pd.read_csv(source, sep=r"\s+", header=None)
+    if df.shape[1] != len(CMAPSS_COLUMNS):
+        raise ValueError(
+            f"Expected {len(CMAPSS_COLUMNS)} CMAPSS columns, got {df.shape[1]}"
+        )
+    df.columns = CMAPSS_COLUMNS
+    return df
+
+
+class FeatureScaler:
+    """
+    The training MinMaxScaler, rebuilt from its data_min and data_max.
+    Scales raw CMAPSS readings with sklearn's X * scale_ + min_.
+    """
+
+    def __init__(
+        self, data_min: Sequence[float], data_max: Sequence[float], feature_range: Tuple[float, float] = (-1.0, 1.0)
+    ):
+        low, high = feature_range
+        data_min = np.asarray(data_min, dtype=np.float64)
+        span = np.asarray(data_max, dtype=np.float64) - data_min
+        # Constant columns are left unscaled, as sklearn does
+        span[span == 0.0] = 1.0
+        self.scale = (high - low) / span
+        self.min = low - data_min * self.scale
+
+    @classmethod
+    def load(cls, path: str | Path) -> FeatureScaler:
+        with open(path) as f:
+            params = json.load(f)
+        if params["columns"] != FEATURE_COLUMNS:
+            raise ValueError(f"Scaler columns {params['columns']} do not match {FEATURE_COLUMNS}")
+        return cls(params["data_min"], params["data_max"], tuple(params["feature_range"]))
+
+    def transform(self, data: np.ndarray) -> np.ndarray:
+        """Scaled float32 rows of raw FEATURE_COLUMNS readings."""
+        return np.ascontiguousarray(data * self.scale + self.min, dtype=np.float32)
 
 
 class RemainingUsefulLifeLoader:
     """Loader for remaining useful life LSTM model."""
     
-    def __init__(self, model_path: str | Path):
+    def __init__(
+        self,
+        model_path: str | Path,
+        batch_size: int = 1024,
+        backend: str = "keras",
+        scaler_path: str | Path | None = None,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown LSTM backend '{backend}', expected one of {BACKENDS}")
         self.model_path = Path(model_path)
         self.model = None
-        self.scaler = None
+        self.scaler: FeatureScaler | None = None
+        self.scaler_path = Path(scaler_path) if scaler_path else self.model_path.parent / SCALER_FILE
         self.sequence_length = 30  # Default sequence length for LSTM
+        self.batch_size = batch_size  # Windows copied and scored per model call
+        self.backend = backend
+        # Inputs must carry the trained channels; rows are read whole into windows
+        self.schema = InputSchema(FEATURE_COLUMNS, np.float32, order="C")
+        # Raw readings are read in float64 and scaled before the cast, as in training
+        self.raw_schema = InputSchema(FEATURE_COLUMNS, np.float64, order="C")
+        self._infer: Callable[[np.ndarray], Any] | None = None
         
     def load(self) -> None:
         """Load the RUL LSTM model from TensorFlow SavedModel format."""
-        if tf is None:
-            raise ImportError("TensorFlow is required for LSTM model but is not installed")
+        tf = _import_tensorflow()
         
         try:
             # Try loading as directory (SavedModel format)
@@ -45,43 +143,59 @@ class RemainingUsefulLifeLoader:
             else:
                 raise ValueError(f"Unsupported model format: {self.model_path.suffix}")
             
-            logger.info(f"✅ Loaded LSTM RUL model from {self.model_path}")
+            if self.scaler_path.is_file():
+                self.scaler = FeatureScaler.load(self.scaler_path)
+            else:
+                logger.warning(f"⚠️ No feature scaler at {self.scaler_path}, raw CMAPSS input will be rejected")
+            
+            self._infer = self._build_backend(tf)
+            # Trace (and for xla, compile) the graph before the first request
+            self._infer(np.zeros((1, self.sequence_length, len(FEATURE_COLUMNS)), dtype=np.float32))
+            
+            logger.info(f"✅ Loaded LSTM RUL model from {self.model_path} ({self.backend} backend)")
         except Exception as e:
             logger.error(f"❌ Failed to load LSTM RUL model: {e}")
             raise
     
-    def prepare_data(self, df: pd.DataFrame) -> np.ndarray:
+    def prepare_data(self, df: pd.DataFrame | np.ndarray) -> np.ndarray:
         """
         Prepare CSV data for sequence prediction.
         Creates sequences for LSTM input.
+        Returns a read-only (windows, sequence_length, features) view.
+        A 3-D array is taken as already prepared windows.
         """
         try:
+            if isinstance(df, np.ndarray):
+                if df.ndim != 3 or df.shape[2] != len(FEATURE_COLUMNS):
+                    raise ValueError(
+                        f"Sequence arrays must have shape (windows, steps, {len(FEATURE_COLUMNS)}), got {df.shape}"
+                    )
+                return df
+            
             # Check minimum data points
             if len(df) < self.sequence_length:
                 raise ValueError(f"Input must contain at least {self.sequence_length} rows for sequences")
             
-            # Get numeric columns (sensor data)
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_cols) == 0:
-                raise ValueError("No numeric columns found in data")
-            
-            data = df[numeric_cols].values.astype(np.float32)
-            
-            # Create sequences covering the entire data
-            sequences = []
-            for i in range(len(data) - self.sequence_length + 1):
-                seq = data[i:i + self.sequence_length]
-                sequences.append(seq)
-            
-            if len(sequences) == 0:
-                raise ValueError("Could not create sequences from input data")
+            data = self.schema.to_array(df)
             
-            return np.array(sequences)
+            # Strided view of every window covering the entire data, no copies.
+            # sliding_window_view puts the window axis last: (windows, features, steps)
+            sequences = sliding_window_view(data, self.sequence_length, axis=0)
+            return sequences.transpose(0, 2, 1)
         except Exception as e:
             logger.error(f"❌ Data preparation failed: {e}")
             raise
     
-    def predict(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def scale(self, data: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Scale raw CMAPSS readings into the [-1, 1] features the LSTM was
+        trained on. Returns (rows, FEATURE_COLUMNS) float32 rows.
+        """
+        if self.scaler is None:
+            raise ValueError(f"Raw CMAPSS input needs the training scaler ({self.scaler_path.name})")
+        return self.scaler.transform(self.raw_schema.to_array(data))
+    
+    def predict(self, df: pd.DataFrame | np.ndarray) -> Dict[str, Any]:
         """
         Make predictions on the provided data.
         Returns RUL predictions for the entire sequence.
@@ -93,19 +207,13 @@ class RemainingUsefulLifeLoader:
             raise ValueError("Model not loaded")
         
         try:
-            X_sequences = self.prepare_data(df)
+            with metrics.stage("prepare"):
+                X_sequences = self.prepare_data(df)
             
-            # Make predictions
-            predictions = self.model.predict(X_sequences, verbose=0)
-            
-            # Handle both direct output and wrapped output
-            if isinstance(predictions, np.ndarray):
-                pred_values = predictions.flatten().tolist()
-            else:
-                pred_values = predictions
+            predictions = self.predict_sequences(X_sequences)
             
             result = {
-                "predictions": pred_values,
+                "predictions": predictions.tolist(),
                 "unit": "cycles",
                 "sequences_used": len(X_sequences)
             }
@@ -114,6 +222,142 @@ class RemainingUsefulLifeLoader:
             logger.error(f"❌ Prediction failed: {e}")
             raise
     
+    def _build_backend(self, tf: Any) -> Callable[[np.ndarray], Any]:
+        """Return the function that scores one contiguous float32 batch."""
+        if self.backend == "keras":
+            return self.model.predict_on_batch
+        
+        model = self.model
+        # Window length stays open so uploads of any sequence length work
+        signature = [tf.TensorSpec([None, None, len(FEATURE_COLUMNS)], tf.float32)]
+        graph = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=signature,
+            jit_compile=self.backend == "xla",
+            reduce_retracing=True,
+        )
+        
+        if self.backend == "function":
+            return lambda batch: graph(tf.constant(batch)).numpy()
+        
+        def padded(batch: np.ndarray) -> np.ndarray:
+            count = len(batch)
+            size = 1 << (count - 1).bit_length()
+            if size != count:
+                buffer = np.zeros((size,) + batch.shape[1:], dtype=np.float32)
+                buffer[:count] = batch
+                batch = buffer
+            return graph(tf.constant(batch)).numpy()[:count]
+        
+        return padded
+    
+    def predict_fleet(self, df: pd.DataFrame, raw: bool = False) -> Dict[str, Any]:
+        """
+        Make per-unit predictions on a multi-engine upload.
+        Rows are grouped by UnitNumber (and ordered by Cycle when present) so
+        no window spans two engines. Windows from all units are packed into
+        shared batches. Features are taken as already scaled unless raw=True
+        (CMAPSS .txt readings), when the training scaler is applied first.
+        
+        Returns:
+            Dict with an RUL curve per unit and the units too short to score
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded")
+        
+        try:
+            if UNIT_COLUMN not in df.columns:
+                raise ValueError(f"Fleet input must contain a '{UNIT_COLUMN}' column")
+            
+            sort_cols = [UNIT_COLUMN, CYCLE_COLUMN] if CYCLE_COLUMN in df.columns else [UNIT_COLUMN]
+            df = df.sort_values(sort_cols, kind="stable")
+            
+            units = df[UNIT_COLUMN].to_numpy()
+            cycles = df[CYCLE_COLUMN].to_numpy() if CYCLE_COLUMN in df.columns else None
+            data = self.scale(df) if raw else self.schema.to_array(df)
+            
+            # Row ranges of each unit in the sorted data
+            starts = np.concatenate([[0], np.flatnonzero(units[1:] != units[:-1]) + 1])
+            ends = np.append(starts[1:], len(units))
+            
+            window_sets = []
+            scored = []
+            skipped = []
+            for start, end in zip(starts, ends):
+                unit = units[start].item()
+                if end - start < self.sequence_length:
+                    skipped.append(unit)
+                    continue
+                windows = sliding_window_view(data[start:end], self.sequence_length, axis=0)
+                window_sets.append(windows.transpose(0, 2, 1))
+                scored.append((unit, start, end))
+            
+            if not window_sets:
+                raise ValueError(
+                    f"No unit has at least {self.sequence_length} rows for sequences"
+                )
+            
+            predictions = self.predict_sequences(*window_sets)
+            
+            curves = []
+            offset = 0
+            for unit, start, end in scored:
+                count = end - start - self.sequence_length + 1
+                if cycles is not None:
+                    window_ends = cycles[start + self.sequence_length - 1:end].tolist()
+                else:
+                    window_ends = list(range(self.sequence_length - 1, end - start))
+                curves.append({
+                    "unit_number": unit,
+                    "window_end": window_ends,
+                    "predictions": predictions[offset:offset + count].tolist(),
+                })
+                offset += count
+            
+            result = {
+                "units": curves,
+                "skipped_units": skipped,
+                "unit": "cycles",
+                "sequences_used": int(offset)
+            }
+            return result
+        except Exception as e:
+            logger.error(f"❌ Prediction failed: {e}")
+            raise
+    
+    def predict_sequences(self, *window_sets: np.ndarray) -> np.ndarray:
+        """
+        Score windows in fixed-size batches.
+        Windows from several sets (e.g. one per engine) are packed into the
+        same batch buffer, and only that buffer is materialised, so memory
+        stays bounded no matter how many windows the strided views hold.
+        """
+        total = sum(len(windows) for windows in window_sets)
+        predictions = np.empty(total, dtype=np.float32)
+        if total == 0:
+            return predictions
+        
+        batch = None
+        filled = 0
+        written = 0
+        for windows in window_sets:
+            position = 0
+            while position < len(windows):
+                if batch is None:
+                    batch = np.empty((min(self.batch_size, total),) + windows.shape[1:], dtype=np.float32)
+                take = min(len(batch) - filled, len(windows) - position)
+                batch[filled:filled + take] = windows[position:position + take]
+                filled += take
+                position += take
+                
+                if filled == len(batch) or written + filled == total:
+                    with metrics.stage("predict"):
+                        output = self._infer(batch[:filled])
+                    predictions[written:written + filled] = np.asarray(output).reshape(filled, -1)[:, 0]
+                    written += filled
+                    filled = 0
+        return predictions
+    
     def is_loaded(self) -> bool:
         """Check if model is properly loaded."""
         return self.model is not None
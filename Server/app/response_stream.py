@@ -0,0 +1,108 @@
+"""
+NDJSON Response Streaming
+Bridges a producer running on an inference worker to a StreamingResponse,
+so batches of predictions reach the client as soon as they are scored.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.warning("orjson not installed, NDJSON streaming uses the json module")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_DONE = object()
+
+
+def dumps(record: Any) -> bytes:
+    """Encode one record as a single JSON line. NumPy arrays are written directly."""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, default=lambda o: o.tolist()) + "\n").encode()
+
+
+class StreamClosed(Exception):
+    """Raised in the producer when the client has gone away."""
+
+
+class NDJSONStream:
+    """
+    Bounded hand-off between a producer thread and the response body.
+    The producer blocks once max_pending lines are waiting, so a slow client
+    throttles inference instead of letting encoded lines pile up in memory.
+    Lines reach an asyncio.Queue through the event loop, so a response
+    waiting for its next batch holds no worker thread. Create it on the
+    event loop that serves the response.
+    """
+
+    def __init__(self, max_pending: int = 8):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Lines the producer may queue before the response body takes one
+        self._slots = threading.Semaphore(max_pending)
+        self._closed = threading.Event()
+
+    def emit(self, record: Any) -> None:
+        """Encode and queue a record. Called from the producer thread."""
+        self._put(dumps(record))
+
+    def finish(self) -> None:
+        """Mark the end of the stream. Called from the producer thread."""
+        try:
+            self._put(_DONE)
+        except StreamClosed:
+            pass
+
+    def run(self, produce: Callable[..., None], *args: Any, **kwargs: Any) -> None:
+        """
+        Run produce(*args, emit=self.emit, **kwargs) and always finish the stream.
+        Errors after the response has started are sent as a final error line.
+        """
+        try:
+            produce(*args, emit=self.emit, **kwargs)
+        except StreamClosed:
+            logger.info("ℹ️ Client closed the prediction stream")
+        except Exception as e:
+            logger.error(f"❌ Streaming prediction failed: {e}")
+            try:
+                self.emit({"error": f"Prediction failed: {str(e)}"})
+            except StreamClosed:
+                pass
+        finally:
+            self.finish()
+
+    async def iterate(self) -> AsyncIterator[bytes]:
+        """Yield encoded lines until the producer finishes."""
+        try:
+            while True:
+                item = await self._queue.get()
+                self._slots.release()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # Unblocks the producer if the client disconnected mid-stream
+            self._closed.set()
+
+    def _put(self, item: Any) -> None:
+        while not self._closed.is_set():
+            if not self._slots.acquire(timeout=0.1):
+                continue
+            try:
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop has shut down
+                break
+            return
+        raise StreamClosed()
@@ -0,0 +1,246 @@
+"""
+Prediction Results
+How a model's loader result is shaped for clients: the prediction objects
+of JSON responses, plain per-row columns (columnar responses, NDJSON
+records and job result files), and the summary and risk level. Each model
+has one ResultShape in SHAPES, so endpoints never branch on model names.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+def compute_risk_level(preds: List[int]) -> str:
+    return risk_level_from_counts(Counter(preds))
+
+
+def risk_level_from_counts(counts: Counter) -> str:
+    """Risk level from a running count of predicted codes."""
+    total = sum(counts.values())
+    if not total:
+        return "Unknown"
+
+    avg_code = sum(code * n for code, n in counts.items()) / total
+
+    most_common_code, _ = counts.most_common(1)[0]
+
+    # You can tune thresholds based on domain meaning
+    if most_common_code == 0 and avg_code < 0.5:
+        return "Low Risk"
+    elif avg_code < 2:
+        return "Medium Risk"
+    else:
+        return "High Risk"
+
+
+def probability_columns(probabilities: Any) -> Dict[str, np.ndarray]:
+    """One probability_<i> column per class, from per-row class probabilities."""
+    probabilities = np.asarray(probabilities)
+    return {f"probability_{i}": probabilities[:, i] for i in range(probabilities.shape[1])}
+
+
+class ResultShape:
+    """Fault code classifiers: one predicted code per input row."""
+
+    # Job result files number their rows by input row, or by scored window
+    index = "row"
+
+    def columns(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Predictions as plain columns, one value per row."""
+        return {"fault_code": result["predictions"]}
+
+    def items(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Prediction objects of a JSON response."""
+        return [{"fault_code": code, "fault_name": f"Fault Code {code}"} for code in result["predictions"]]
+
+    def probabilities(self, result: Dict[str, Any]) -> Any:
+        """Class probabilities per row, or None."""
+        return result.get("probabilities")
+
+    def codes(self, result: Dict[str, Any]) -> List[int]:
+        """Fault codes the risk level is computed from."""
+        return result["predictions"]
+
+    def latest_label(self, result: Dict[str, Any]) -> str | None:
+        """Label reported as the prediction of a streamed response, if any."""
+        return None
+
+    def unit(self, result: Dict[str, Any]) -> str | None:
+        return None
+
+    def summary(self, model_name: str, result: Dict[str, Any]) -> Tuple[str, str | None]:
+        summary = f"Generated {len(result['predictions'])} predictions using '{model_name}'."
+        return summary, compute_risk_level(self.codes(result))
+
+    def stream_summary(
+        self, model_name: str, rows: int, counts: Counter, latest_label: str | None
+    ) -> Tuple[str, str | None]:
+        """Summary and risk level closing an NDJSON response."""
+        if latest_label is not None:
+            return f"Prediction: {latest_label}", risk_level_from_counts(counts)
+        return f"Streamed predictions for {rows} rows using '{model_name}'.", risk_level_from_counts(counts)
+
+
+class EngineLabel(ResultShape):
+    """Engine maintenance: one labelled prediction for the latest window."""
+
+    def columns(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {"fault_code": [result["prediction"]], "fault_name": [result["label"]]}
+
+    def items(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"fault_code": result["prediction"], "fault_name": result["label"]}]
+
+    def probabilities(self, result: Dict[str, Any]) -> Any:
+        probabilities = result.get("probabilities")
+        return [probabilities] if probabilities is not None else None
+
+    def codes(self, result: Dict[str, Any]) -> List[int]:
+        return [result["prediction"]]
+
+    def latest_label(self, result: Dict[str, Any]) -> str | None:
+        return result["label"]
+
+    def summary(self, model_name: str, result: Dict[str, Any]) -> Tuple[str, str | None]:
+        return f"Prediction: {result['label']}", compute_risk_level(self.codes(result))
+
+
+class EngineWindows(ResultShape):
+    """Engine maintenance trajectory: one labelled prediction per window, latest last."""
+
+    def columns(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "window_end": result["window_end"],
+            "fault_code": result["predictions"],
+            "fault_name": result["labels"],
+        }
+
+    def items(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {"fault_code": code, "fault_name": label, "window_end": end}
+            for code, label, end in zip(result["predictions"], result["labels"], result["window_end"])
+        ]
+
+    def codes(self, result: Dict[str, Any]) -> List[int]:
+        # The risk is the engine's current one, from the latest window
+        return result["predictions"][-1:]
+
+    def latest_label(self, result: Dict[str, Any]) -> str | None:
+        return result["labels"][-1]
+
+    def summary(self, model_name: str, result: Dict[str, Any]) -> Tuple[str, str | None]:
+        summary = f"Scored {len(result['predictions'])} windows. Latest prediction: {result['labels'][-1]}"
+        return summary, compute_risk_level(self.codes(result))
+
+
+class RemainingLife(ResultShape):
+    """RUL regressors: one remaining useful life per row or sequence window, without a risk level."""
+
+    def __init__(self, index: str = "row"):
+        self.index = index
+
+    def columns(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {"rul": result["predictions"]}
+
+    def items(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        unit = self.unit(result)
+        return [{"rul": float(p), "unit": unit} for p in result["predictions"]]
+
+    def codes(self, result: Dict[str, Any]) -> List[int]:
+        return []
+
+    def unit(self, result: Dict[str, Any]) -> str | None:
+        return result.get("unit", "cycles")
+
+    def summary(self, model_name: str, result: Dict[str, Any]) -> Tuple[str, str | None]:
+        return f"Generated {len(result['predictions'])} RUL predictions using '{model_name}'.", None
+
+    def stream_summary(
+        self, model_name: str, rows: int, counts: Counter, latest_label: str | None
+    ) -> Tuple[str, str | None]:
+        return f"Streamed RUL predictions for {rows} rows using '{model_name}'.", None
+
+
+class LandingGear(ResultShape):
+    """Landing gear pipeline: a fault code and the RUL it implies per row."""
+
+    def columns(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {"fault_code": result["predictions"], "rul": result["rul"]}
+
+    def items(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {"fault_code": code, "fault_name": f"Fault Code {code}", "rul": float(rul), "unit": result["unit"]}
+            for code, rul in zip(result["predictions"], result["rul"])
+        ]
+
+    def unit(self, result: Dict[str, Any]) -> str | None:
+        return result["unit"]
+
+    def summary(self, model_name: str, result: Dict[str, Any]) -> Tuple[str, str | None]:
+        summary = f"Generated {len(result['predictions'])} fault and RUL predictions from one pass."
+        return summary, compute_risk_level(self.codes(result))
+
+
+# Result shape of every model, and of the landing gear pipeline's responses
+SHAPES: Dict[str, ResultShape] = {
+    "engine_maintenance": EngineLabel(),
+    "landing_gear_fault": ResultShape(),
+    "durability": ResultShape(),
+    "landing_gear_rul": RemainingLife(),
+    # The LSTM predicts one RUL per sequence window rather than per row
+    "remaining_useful_life": RemainingLife(index="window"),
+    "landing_gear": LandingGear(),
+}
+# engine_maintenance results scored with trajectory=True
+TRAJECTORY = EngineWindows()
+
+
+def shape_for(model_name: str, trajectory: bool = False) -> ResultShape:
+    if trajectory:
+        return TRAJECTORY
+    shape = SHAPES.get(model_name)
+    if shape is None:
+        raise ValueError(f"Unknown model type: {model_name}")
+    return shape
+
+
+def summarize_result(
+    model_name: str, result: Dict[str, Any], trajectory: bool = False
+) -> Tuple[str, str | None]:
+    """Summary and risk level of one model's loader result."""
+    return shape_for(model_name, trajectory).summary(model_name, result)
+
+
+def result_items(model_name: str, result: Dict[str, Any], trajectory: bool = False) -> List[Dict[str, Any]]:
+    """JSON prediction objects of one model's loader result, with class probabilities if scored."""
+    shape = shape_for(model_name, trajectory)
+    items = shape.items(result)
+    probabilities = shape.probabilities(result)
+    if probabilities is not None:
+        for item, row in zip(items, probabilities):
+            item["probabilities"] = row
+    return items
+
+
+def result_columns(model_name: str, result: Dict[str, Any], trajectory: bool = False) -> Dict[str, Any]:
+    """Predictions of one model's loader result as plain columns, for result files and columnar responses."""
+    shape = shape_for(model_name, trajectory)
+    columns = shape.columns(result)
+    probabilities = shape.probabilities(result)
+    if probabilities is not None:
+        columns.update(probability_columns(probabilities))
+    return columns
+
+
+def result_metadata(model_name: str, rows: int, result: Dict[str, Any], trajectory: bool = False) -> Dict[str, Any]:
+    """Response fields sent alongside the columns of a columnar response."""
+    shape = shape_for(model_name, trajectory)
+    summary, risk_level = shape.summary(model_name, result)
+    metadata = {"model": model_name, "rows": rows, "summary": summary, "risk_level": risk_level}
+    unit = shape.unit(result)
+    if unit is not None:
+        metadata["unit"] = unit
+    return metadata
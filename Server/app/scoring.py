@@ -0,0 +1,34 @@
+"""
+Classifier Scoring
+Shared scoring path for the sklearn classifiers: one predict_proba pass,
+with class labels taken from the argmax instead of a second predict call.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Tuple
+
+import numpy as np
+
+from .input_schema import unnamed_features
+from .metrics import metrics
+
+
+def classify(model: Any, X: Any) -> Tuple[np.ndarray, np.ndarray | None]:
+    """
+    Score X once and return (labels, probabilities).
+    Labels are classes_[argmax(proba)], which is what predict returns for the
+    repo's classifiers (logistic regression, random forest, gradient boosting),
+    ties included since both pick the first maximum.
+    Models without predict_proba fall back to predict and return no probabilities.
+    X is a schema-built array, so sklearn's missing feature names warning is silenced.
+    """
+    predict_proba = getattr(model, "predict_proba", None)
+    classes = getattr(model, "classes_", None)
+    if predict_proba is None or classes is None:
+        with metrics.stage("predict"), unnamed_features():
+            return np.asarray(model.predict(X)), None
+
+    with metrics.stage("predict_proba"), unnamed_features():
+        probabilities = predict_proba(X)
+    return np.asarray(classes)[np.argmax(probabilities, axis=1)], probabilities
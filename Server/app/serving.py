@@ -0,0 +1,210 @@
+"""
+Model Serving
+State shared by the API routers: the model registry, the per-model
+inference lanes that parsing and scoring run on, request metrics, and the
+helpers that check an upload's format and parse it for a model.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List
+import logging
+
+from fastapi import HTTPException, UploadFile
+
+from .engine_maintenance_loader import EngineMaintenanceLoader, SENSORS
+from .landing_gear_fault_loader import LandingGearFaultLoader
+from .landing_gear_rul_loader import LandingGearRULLoader
+from .durability_loader import DurabilityLoader
+from .remaining_useful_life_loader import RemainingUsefulLifeLoader, read_cmapss
+from .inference_executor import InferenceExecutor, InferenceQueueFull
+from .metrics import metrics
+from .model_registry import ModelLoadError, ModelRegistry, ModelSpec
+from . import upload_formats
+from . import config
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+MODEL_DIR = (BASE_DIR.parent / "Model").resolve()
+SAMPLE_DIR = MODEL_DIR / "sample_data"
+
+# Whitespace separated CMAPSS text files, accepted by the fleet endpoint
+CMAPSS_FORMAT = "cmapss"
+
+# Models that score each row independently and can consume the upload in chunks
+ROW_WISE_MODELS = {"landing_gear_fault", "landing_gear_rul", "durability"}
+
+# Classifiers that can return class probabilities on request
+CLASSIFIER_MODELS = {"engine_maintenance", "landing_gear_fault", "durability"}
+
+# Parsing and inference run here instead of on the event loop
+executor = InferenceExecutor(
+    default_concurrency=config.INFERENCE_DEFAULT_CONCURRENCY,
+    max_queue=config.INFERENCE_MAX_QUEUE,
+    concurrency=config.INFERENCE_CONCURRENCY,
+)
+
+# Model artifacts under MODEL_DIR; each is loaded on first use
+MODEL_SPECS = [
+    ModelSpec(
+        "engine_maintenance",
+        "engine_maintenance_pipeline.pkl",
+        functools.partial(
+            EngineMaintenanceLoader,
+            tree_engine=config.TREE_ENGINE,
+            max_rows=config.TREE_ENGINE_MAX_ROWS,
+        ),
+        "Engine Maintenance",
+    ),
+    ModelSpec("landing_gear_fault", "LandingGearFaultPrediction.pkl", LandingGearFaultLoader, "Landing Gear Fault"),
+    ModelSpec("landing_gear_rul", "LandingGearRUL.pkl", LandingGearRULLoader, "Landing Gear RUL"),
+    ModelSpec(
+        "durability",
+        "durability.pkl",
+        functools.partial(
+            DurabilityLoader,
+            tree_engine=config.TREE_ENGINE,
+            max_rows=config.TREE_ENGINE_MAX_ROWS,
+        ),
+        "Durability",
+    ),
+    ModelSpec(
+        "remaining_useful_life",
+        "remainingUsefulLife_lstm.keras",
+        functools.partial(
+            RemainingUsefulLifeLoader,
+            batch_size=config.RUL_BATCH_SIZE,
+            backend=config.RUL_BACKEND,
+        ),
+        "Remaining Useful Life LSTM",
+    ),
+]
+
+registry = ModelRegistry(MODEL_DIR, MODEL_SPECS)
+
+# Ready model loaders by name
+models = registry.models
+
+
+async def get_loader(model_name: str) -> Any:
+    """Return the model's loader, loading it on the model's worker lane on first use."""
+    if model_name not in registry:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found.")
+    loader = registry.loaded(model_name)
+    if loader is not None:
+        return loader
+    try:
+        return await executor.run(model_name, registry.get, model_name)
+    except InferenceQueueFull as e:
+        record_error(model_name, e)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelLoadError as e:
+        record_error(model_name, e)
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def record_error(model_name: str, error: Exception) -> None:
+    metrics.inc("errors_total", model=model_name, exception=type(error).__name__)
+
+
+def record_request(model_name: str, outcome: str, started: float, rows: int | None = None) -> None:
+    """Count a finished request and its end-to-end latency."""
+    metrics.inc("requests_total", model=model_name, outcome=outcome)
+    metrics.observe("stage_seconds", time.perf_counter() - started, model=model_name, stage="total")
+    if rows is not None:
+        metrics.inc("rows_total", rows, model=model_name)
+        metrics.observe("request_rows", rows, model=model_name)
+
+
+def upload_compression(file: UploadFile) -> str | None:
+    """Compression named by the file part's Content-Encoding header, or a 415 error."""
+    encoding = (file.headers.get("content-encoding") or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    compression = upload_formats.CONTENT_ENCODINGS.get(encoding)
+    if compression is None:
+        allowed = ", ".join(upload_formats.CONTENT_ENCODINGS)
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding '{encoding}'. Allowed: {allowed}")
+    return compression
+
+
+def check_upload_format(file: UploadFile, cmapss: bool = False) -> str:
+    """
+    Upload format from the file name and the part's Content-Encoding, or a
+    400/415 error. Compressed CSV uploads (.csv.gz, .csv.zst or a gzip/zstd
+    Content-Encoding) get a compressed format such as "csv.gz". With
+    cmapss=True, .txt files are raw CMAPSS data.
+    """
+    filename = file.filename or ""
+    compression = upload_compression(file)
+    name, named_compression = upload_formats.strip_compression(filename)
+    if cmapss and name.endswith(".txt"):
+        conflict = compression and named_compression and compression != named_compression
+        fmt = None if conflict else upload_formats.with_compression(CMAPSS_FORMAT, compression or named_compression)
+    else:
+        fmt = upload_formats.detect_format(filename, compression)
+    if fmt is None:
+        allowed = upload_formats.supported_suffixes() + ([".txt"] if cmapss else [])
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {', '.join(allowed)}")
+    if not upload_formats.format_available(fmt):
+        raise HTTPException(status_code=415, detail=f"Uploads in {fmt} format are not available on this server.")
+    return fmt
+
+
+def input_columns(model_name: str, loader: Any) -> List[str] | None:
+    """Column names used to label headerless NumPy uploads."""
+    if model_name == "engine_maintenance":
+        return list(SENSORS)
+    schema = getattr(loader, "schema", None)
+    return list(schema.columns) if schema is not None else None
+
+
+def csv_column_types(model_name: str, loader: Any) -> Dict[str, str] | None:
+    """Types the model's known input columns are parsed as from CSV uploads."""
+    if model_name == "engine_maintenance":
+        return {sensor: "float64" for sensor in SENSORS}
+    schema = getattr(loader, "schema", None)
+    return schema.csv_types() if schema is not None else None
+
+
+def upload_frames(
+    model_name: str, loader: Any, source: BinaryIO, fmt: str, chunk_rows: int | None = None
+) -> Any:
+    """Iterate over the upload as DataFrames (or LSTM window arrays) for this model."""
+    frames = upload_formats.read_frames(
+        source,
+        fmt,
+        chunk_rows=chunk_rows,
+        columns=input_columns(model_name, loader),
+        sequences=model_name == "remaining_useful_life",
+        column_types=csv_column_types(model_name, loader),
+    )
+    return metrics.timed_iter(frames, "parse", model_name)
+
+
+def read_upload(model_name: str, loader: Any, source: BinaryIO, fmt: str) -> Any:
+    """Parse the whole upload into a single frame."""
+    frame = next(upload_frames(model_name, loader, source, fmt), None)
+    if frame is None:
+        raise ValueError("Upload contains no rows")
+    return frame
+
+
+def parse_and_predict_fleet(loader: Any, source: BinaryIO, fmt: str) -> tuple[int, Dict[str, Any]]:
+    """Parse a multi-unit upload and run the fleet prediction. Runs on an inference worker."""
+    base, compression = upload_formats.split_compression(fmt)
+    raw = base == CMAPSS_FORMAT
+    with metrics.stage("parse"):
+        if raw:
+            # Whitespace separated, which pandas parses and Arrow's single-character delimiter cannot
+            df = read_cmapss(upload_formats.open_decompressed(source, compression))
+        else:
+            df = next(upload_formats.read_frames(
+                source, fmt, column_types=csv_column_types("remaining_useful_life", loader)
+            ))
+    # CMAPSS files hold raw readings; tables are expected already scaled
+    return len(df), loader.predict_fleet(df, raw=raw)
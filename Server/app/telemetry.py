@@ -0,0 +1,152 @@
+"""
+Live Telemetry
+Per-unit state for engines that report one cycle of sensor readings at a
+time. Each model keeps a ring buffer of the unit's most recent cycles (or,
+for the engine maintenance model, rolling window features), so a new cycle
+overwrites the oldest slot and scoring it touches only the latest window,
+however long the unit's history grows.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """The last `length` rows pushed; pushing a row overwrites the oldest one."""
+
+    def __init__(self, length: int, width: int, dtype: Any = np.float64):
+        self.length = length
+        self._data = np.zeros((length, width), dtype=dtype)
+        self.count = 0
+
+    def push(self, row: np.ndarray) -> None:
+        self._data[self.count % self.length] = row
+        self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.length
+
+    def window(self) -> np.ndarray:
+        """The buffered rows, oldest first."""
+        start = self.count % self.length
+        if start == 0:
+            return self._data.copy()
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+
+@dataclass(frozen=True)
+class Channel:
+    """The readings one model needs from every cycle, and how many cycles it scores."""
+
+    name: str
+    columns: List[str]
+    length: int
+    dtype: Any = np.float64
+    # Alternative reading names accepted for a column, e.g. "Sensor2" for "s2"
+    aliases: Dict[str, str] = field(default_factory=dict)
+    # Per-unit state built as buffer(length, width); anything with push, full and count.
+    # By default the rows themselves are kept in a RingBuffer of the channel dtype
+    buffer: Callable[[int, int], Any] | None = None
+
+    def new_buffer(self) -> Any:
+        if self.buffer is None:
+            return RingBuffer(self.length, len(self.columns), self.dtype)
+        return self.buffer(self.length, len(self.columns))
+
+    def values(self, readings: Mapping[str, Any]) -> np.ndarray:
+        row = np.empty(len(self.columns), dtype=self.dtype)
+        for i, column in enumerate(self.columns):
+            value = readings.get(column)
+            if value is None:
+                value = readings.get(self.aliases.get(column, column))
+            if value is None:
+                raise ValueError(f"Missing reading: {column}")
+            row[i] = value
+        return row
+
+
+class UnitState:
+    """Ring buffers of one unit, one per channel."""
+
+    def __init__(self, channels: List[Channel]):
+        self.buffers = {c.name: c.new_buffer() for c in channels}
+        self.cycle: int | None = None
+
+    @property
+    def cycles_seen(self) -> int:
+        return max(buffer.count for buffer in self.buffers.values())
+
+
+class TelemetrySession:
+    """Unit states of one live connection, keyed by unit id."""
+
+    def __init__(self, channels: List[Channel], max_units: int = 1000):
+        self.channels = channels
+        self.max_units = max_units
+        self.units: Dict[Hashable, UnitState] = {}
+        # Unit states as they were before the open transaction first changed them
+        self._undo: Dict[Hashable, UnitState | None] | None = None
+
+    def push(self, unit: Hashable, readings: Mapping[str, Any], cycle: int | None = None) -> UnitState:
+        """
+        Append one cycle of readings to the unit's buffers.
+        Readings are validated for every channel before any buffer changes,
+        and a cycle number at or below the last one received is rejected.
+        """
+        state = self.units.get(unit)
+        if state is not None and cycle is not None and state.cycle is not None and cycle <= state.cycle:
+            raise ValueError(f"Cycle {cycle} of unit {unit} is not after cycle {state.cycle}")
+        rows = {channel.name: channel.values(readings) for channel in self.channels}
+
+        if state is None:
+            if len(self.units) >= self.max_units:
+                raise ValueError(f"Session already tracks {self.max_units} units")
+            self._remember(unit, None)
+            state = self.units[unit] = UnitState(self.channels)
+        else:
+            self._remember(unit, state)
+        for name, row in rows.items():
+            state.buffers[name].push(row)
+        if cycle is not None:
+            state.cycle = cycle
+        return state
+
+    def reset(self, unit: Hashable) -> bool:
+        state = self.units.pop(unit, None)
+        if state is not None:
+            self._remember(unit, state)
+        return state is not None
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Undo every push and reset made inside the block if it raises, so a
+        message that could not be scored can be sent again unchanged.
+        """
+        self._undo = {}
+        try:
+            yield
+        except BaseException:
+            for unit, state in self._undo.items():
+                if state is None:
+                    self.units.pop(unit, None)
+                else:
+                    self.units[unit] = state
+            raise
+        finally:
+            self._undo = None
+
+    def _remember(self, unit: Hashable, state: UnitState | None) -> None:
+        """Keep a copy of the unit's state before the open transaction first changes it."""
+        if self._undo is not None and unit not in self._undo:
+            self._undo[unit] = copy.deepcopy(state)
@@ -0,0 +1,184 @@
+"""
+Telemetry Router
+The live telemetry WebSocket: units stream one cycle of readings at a time
+and get back their updated RUL and engine maintenance label.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import operator
+import time
+from typing import Any, Dict, List, Tuple
+import logging
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+from .engine_maintenance_loader import RollingWindowFeatures, SENSORS, WINDOW_SIZE
+from .remaining_useful_life_loader import FEATURE_COLUMNS
+from .inference_executor import InferenceQueueFull
+from .serving import executor, get_loader, record_request, registry
+from .telemetry import Channel, TelemetrySession
+from . import config
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def telemetry_channel(model_name: str, loader: Any) -> Channel:
+    """Readings and window length a live unit needs for one model."""
+    if model_name == "remaining_useful_life":
+        # Raw readings, as in CMAPSS files; score_rul_windows scales them
+        return Channel(model_name, list(FEATURE_COLUMNS), loader.sequence_length)
+    # Engine sensors s2..s16 are the CMAPSS Sensor2..Sensor16 channels
+    return Channel(
+        model_name, list(SENSORS), WINDOW_SIZE,
+        aliases={s: f"Sensor{s[1:]}" for s in SENSORS},
+        buffer=RollingWindowFeatures,
+    )
+
+
+def score_rul_windows(loader: Any, windows: List[np.ndarray]) -> List[Dict[str, Any]]:
+    # Scaled with the scoring loader's own training scaler, so windows
+    # buffered before a reload are scaled for the model that now scores them
+    if loader.scaler is None:
+        raise ValueError(f"Raw readings need the training scaler ({loader.scaler_path.name})")
+    scaled = loader.scaler.transform(np.stack(windows))
+    return [{"rul": rul} for rul in loader.predict_sequences(scaled).tolist()]
+
+
+def score_engine_features(loader: Any, features: List[np.ndarray]) -> List[Dict[str, Any]]:
+    result = loader.predict_features(np.vstack(features))
+    return [
+        {"fault_code": code, "fault_name": label} for code, label in zip(result["predictions"], result["labels"])
+    ]
+
+
+# Models scored on every live telemetry cycle: what each reads from a unit's
+# buffer, and the scorer turning those inputs into one reply update each
+TELEMETRY_SCORERS = {
+    "remaining_useful_life": (operator.methodcaller("window"), score_rul_windows),
+    "engine_maintenance": (operator.methodcaller("features"), score_engine_features),
+}
+TELEMETRY_MODELS = tuple(TELEMETRY_SCORERS)
+
+
+async def score_ticks(
+    session: TelemetrySession, loaders: Dict[str, Any], ticks: List[Any]
+) -> List[Dict[str, Any]]:
+    """
+    Add each tick's cycle to its unit and score the updated windows.
+    Windows of all units in one message share one call per model. If
+    scoring fails (e.g. a full lane), no unit keeps the message's cycles,
+    so the client can send it again.
+    """
+    with session.transaction():
+        replies: List[Dict[str, Any]] = []
+        pending: Dict[str, List[Tuple[Dict[str, Any], np.ndarray]]] = {name: [] for name in loaders}
+        for tick in ticks:
+            if not isinstance(tick, dict) or "unit" not in tick:
+                replies.append({"error": "Each message needs a 'unit'"})
+                continue
+            unit = tick["unit"]
+            if isinstance(unit, bool) or not isinstance(unit, (int, str)):
+                replies.append({"unit": unit, "error": "'unit' must be an integer or a string"})
+                continue
+            if tick.get("reset"):
+                replies.append({"unit": unit, "reset": session.reset(unit)})
+                continue
+            try:
+                readings = tick.get("readings")
+                if not isinstance(readings, dict):
+                    raise ValueError("'readings' must be an object of sensor values")
+                state = session.push(unit, readings, tick.get("cycle"))
+            except (TypeError, ValueError) as e:
+                replies.append({"unit": unit, "error": str(e)})
+                continue
+
+            reply = {
+                "unit": unit,
+                "cycle": state.cycle,
+                "cycles_seen": state.cycles_seen,
+                "rul": None,
+                "fault_code": None,
+                "fault_name": None,
+            }
+            replies.append(reply)
+            for model_name in loaders:
+                buffer = state.buffers[model_name]
+                if buffer.full:
+                    model_input, _ = TELEMETRY_SCORERS[model_name]
+                    pending[model_name].append((reply, model_input(buffer)))
+
+        started = time.perf_counter()
+        names = [name for name, items in pending.items() if items]
+        results = await asyncio.gather(*(
+            executor.run(name, TELEMETRY_SCORERS[name][1], loaders[name], [inputs for _, inputs in pending[name]])
+            for name in names
+        ))
+        for name, updates in zip(names, results):
+            for (reply, _), update in zip(pending[name], updates):
+                reply.update(update)
+            record_request(name, "live", started, rows=len(pending[name]))
+    return replies
+
+
+@router.websocket("/ws/telemetry")
+async def live_telemetry(websocket: WebSocket) -> None:
+    """
+    Live engine telemetry: send one cycle per unit as
+    {"unit": ..., "cycle": ..., "readings": {...}} (or a list of them) and
+    receive the unit's updated RUL and engine maintenance label. Each unit
+    keeps a ring buffer of its latest cycles for this connection, so only
+    the newest window is scored per cycle. {"unit": ..., "reset": true}
+    drops a unit's buffered cycles.
+    """
+    await websocket.accept()
+    loaders: Dict[str, Any] = {}
+    for model_name in TELEMETRY_MODELS:
+        try:
+            loaders[model_name] = await get_loader(model_name)
+        except HTTPException as e:
+            logger.warning(f"⚠️ Live telemetry without {model_name}: {e.detail}")
+    rul_loader = loaders.get("remaining_useful_life")
+    if rul_loader is not None and rul_loader.scaler is None:
+        logger.warning("⚠️ Live telemetry without remaining_useful_life: no feature scaler for raw readings")
+        del loaders["remaining_useful_life"]
+    if not loaders:
+        await websocket.close(code=1011, reason="No telemetry model is available")
+        return
+
+    channels = [telemetry_channel(name, loader) for name, loader in loaders.items()]
+    session = TelemetrySession(channels, max_units=config.TELEMETRY_MAX_UNITS)
+    await websocket.send_json({
+        "models": {c.name: {"window": c.length, "readings": c.columns} for c in channels},
+    })
+
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                await websocket.send_json({"error": "Messages must be JSON"})
+                continue
+
+            # Pick up models reloaded since the last message
+            for name in loaders:
+                loaders[name] = registry.loaded(name) or loaders[name]
+            ticks = message if isinstance(message, list) else [message]
+            try:
+                replies = await score_ticks(session, loaders, ticks)
+            except InferenceQueueFull as e:
+                await websocket.send_json({"error": str(e), "retry": True})
+                continue
+            except Exception as e:
+                logger.error(f"❌ Live telemetry scoring failed: {e}")
+                await websocket.send_json({"error": f"Prediction failed: {e}"})
+                continue
+            await websocket.send_json(replies if isinstance(message, list) else replies[0])
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,358 @@
+"""
+Upload Formats
+Readers for the file types accepted by the prediction endpoints.
+CSV is parsed with pyarrow's CSV reader (pandas without pyarrow), with the
+model's known feature columns pinned to fixed types instead of inferred on
+every request, and may be uploaded gzip or zstd compressed; it is then
+decompressed as it is parsed. Parquet, Arrow IPC and NumPy uploads are read
+from a memory map of the spooled upload, so columnar data goes to NumPy
+without a float parsing step and, where the layout allows, without copies.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import mmap
+from typing import Any, BinaryIO, Iterator, List, Mapping, Sequence, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .input_schema import SchemaError
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pacsv = None
+    pq = None
+    logger.warning("pyarrow not installed, Parquet and Arrow uploads are disabled")
+
+CSV = "csv"
+PARQUET = "parquet"
+ARROW = "arrow"
+NPY = "npy"
+NPZ = "npz"
+
+SUFFIXES = {
+    ".csv": CSV,
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".arrow": ARROW,
+    ".arrows": ARROW,
+    ".ipc": ARROW,
+    ".feather": ARROW,
+    ".npy": NPY,
+    ".npz": NPZ,
+}
+
+
+# Compression of text uploads, appended to the format as in "csv.gz"
+GZIP = "gz"
+ZSTD = "zst"
+
+COMPRESSION_SUFFIXES = {
+    ".gz": GZIP,
+    ".gzip": GZIP,
+    ".zst": ZSTD,
+    ".zstd": ZSTD,
+}
+# Content-Encoding header values
+CONTENT_ENCODINGS = {
+    "gzip": GZIP,
+    "x-gzip": GZIP,
+    "zstd": ZSTD,
+}
+# pyarrow codec names
+CODECS = {GZIP: "gzip", ZSTD: "zstd"}
+# Columnar formats compress internally; only text uploads are decompressed
+COMPRESSIBLE = (CSV,)
+
+# Bytes read at a time while looking for the end of the CSV header
+HEADER_READ_BYTES = 64 * 1024
+
+# Values of columns pinned to bool: pandas' spellings plus 0/1
+TRUE_VALUES = ["True", "TRUE", "true", "1", "1.0"]
+FALSE_VALUES = ["False", "FALSE", "false", "0", "0.0"]
+
+
+def strip_compression(filename: str) -> Tuple[str, str | None]:
+    """(name without a compression suffix, compression or None)."""
+    name = filename.lower()
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            return name[:-len(suffix)], compression
+    return name, None
+
+
+def with_compression(fmt: str, compression: str | None) -> str:
+    return f"{fmt}.{compression}" if compression else fmt
+
+
+def split_compression(fmt: str) -> Tuple[str, str | None]:
+    """("csv", "gz") for "csv.gz"; (fmt, None) for uncompressed formats."""
+    base, _, compression = fmt.partition(".")
+    return base, compression or None
+
+
+def detect_format(filename: str, compression: str | None = None) -> str | None:
+    """
+    Upload format from the file name, or None if it is not supported.
+    A compression suffix (or the given compression, e.g. from a
+    Content-Encoding header) is only accepted on compressible formats.
+    """
+    name, suffix_compression = strip_compression(filename)
+    if compression and suffix_compression and compression != suffix_compression:
+        return None
+    compression = compression or suffix_compression
+    for suffix, fmt in SUFFIXES.items():
+        if name.endswith(suffix):
+            if compression and fmt not in COMPRESSIBLE:
+                return None
+            return with_compression(fmt, compression)
+    return None
+
+
+def compression_available(compression: str | None) -> bool:
+    if compression is None:
+        return True
+    if pa is not None:
+        return pa.Codec.is_available(CODECS[compression])
+    return compression == GZIP
+
+
+def format_available(fmt: str) -> bool:
+    """Whether the optional dependencies for a (possibly compressed) format are installed."""
+    fmt, compression = split_compression(fmt)
+    if fmt in (PARQUET, ARROW):
+        return pa is not None
+    return compression_available(compression)
+
+
+def supported_suffixes() -> List[str]:
+    suffixes = [suffix for suffix, fmt in SUFFIXES.items() if format_available(fmt)]
+    for suffix, fmt in SUFFIXES.items():
+        if fmt in COMPRESSIBLE:
+            suffixes += [suffix + "." + c for c in CODECS if compression_available(c)]
+    return suffixes
+
+
+def map_upload(source: BinaryIO) -> Any:
+    """
+    Read-only buffer over the whole upload.
+    Uploads spooled to disk are memory mapped; in-memory uploads expose their
+    buffer directly. Falls back to reading the bytes.
+    """
+    try:
+        # SpooledTemporaryFile.fileno() moves a small in-memory upload to disk first
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        pass
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    source.seek(0)
+    return source.read()
+
+
+def open_decompressed(source: BinaryIO, compression: str | None) -> Any:
+    """
+    The upload as a stream of uncompressed bytes, decompressed as it is read
+    rather than inflated into memory first. Uncompressed uploads are returned
+    as they are.
+    """
+    if compression is None:
+        return source
+    if pa is not None:
+        return pa.CompressedInputStream(pa.BufferReader(pa.py_buffer(map_upload(source))), CODECS[compression])
+    if compression == GZIP:
+        source.seek(0)
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    raise ValueError(f"pyarrow is required for {CODECS[compression]} uploads")
+
+
+def _csv_stream(source: BinaryIO, compression: str | None) -> Any:
+    if compression is None:
+        return pa.BufferReader(pa.py_buffer(map_upload(source)))
+    return open_decompressed(source, compression)
+
+
+def _csv_header(stream: Any) -> List[str]:
+    """Column names on the first line of a CSV stream."""
+    head = b""
+    while b"\n" not in head:
+        block = stream.read(HEADER_READ_BYTES)
+        if not block:
+            break
+        head += block
+    line = head.split(b"\n", 1)[0].decode("utf-8", errors="replace").rstrip("\r")
+    return next(csv.reader([line]), [])
+
+
+def _csv_tables(
+    source: BinaryIO, compression: str | None, chunk_rows: int | None, column_types: Mapping[str, str] | None
+) -> Iterator[Any]:
+    """
+    Arrow tables of a CSV upload, with the given columns parsed as fixed types.
+    A whole upload is parsed by the multithreaded reader. Chunked uploads
+    are streamed so memory stays bounded; the streaming reader infers types
+    from the first block, so when column types are given only those columns
+    are read and a later block cannot contradict the inferred type.
+    """
+    if chunk_rows and column_types:
+        # Check the header first: Arrow rejects a missing include_columns
+        # entry with its own message rather than the schema's
+        header = _csv_header(_csv_stream(source, compression))
+        missing = [name for name in column_types if name not in header]
+        if missing:
+            padded = [name for name in header if name.strip() in missing]
+            hint = f" (header names with surrounding whitespace: {padded})" if padded else ""
+            raise SchemaError(f"Missing columns: {missing}{hint}")
+    stream = _csv_stream(source, compression)
+    convert_options = pacsv.ConvertOptions(
+        column_types={name: pa.type_for_alias(kind) for name, kind in (column_types or {}).items()},
+        true_values=TRUE_VALUES,
+        false_values=FALSE_VALUES,
+    )
+    if not chunk_rows:
+        yield pacsv.read_csv(stream, read_options=pacsv.ReadOptions(use_threads=True), convert_options=convert_options)
+        return
+
+    if column_types:
+        convert_options.include_columns = list(column_types)
+    reader = pacsv.open_csv(stream, convert_options=convert_options)
+    # Regroup the reader's ~1 MB batches into chunk_rows rows per table
+    pending: List[Any] = []
+    count = 0
+    for batch in reader:
+        pending.append(batch)
+        count += batch.num_rows
+        while count >= chunk_rows:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield table.slice(0, chunk_rows)
+            rest = table.slice(chunk_rows)
+            pending = rest.to_batches()
+            count = rest.num_rows
+    if count:
+        yield pa.Table.from_batches(pending, schema=reader.schema)
+
+
+def _array_from_npy(buffer: Any) -> np.ndarray:
+    """View a .npy payload without copying the data section."""
+    view = memoryview(buffer)
+    major, _ = np.lib.format.read_magic(io.BytesIO(view[:8].tobytes()))
+    # Header length field is 2 bytes in format 1.0 and 4 bytes afterwards
+    length_size = 2 if major == 1 else 4
+    header_end = 8 + length_size + int.from_bytes(view[8:8 + length_size], "little")
+
+    header = io.BytesIO(view[:header_end].tobytes())
+    version = np.lib.format.read_magic(header)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not accepted")
+
+    count = int(np.prod(shape)) if shape else 1
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=header_end)
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def read_array(source: BinaryIO, fmt: str) -> np.ndarray:
+    """Read a .npy or .npz upload. For .npz the first array is used."""
+    if fmt == NPY:
+        return _array_from_npy(map_upload(source))
+    if fmt == NPZ:
+        source.seek(0)
+        with np.load(source, allow_pickle=False) as archive:
+            if not archive.files:
+                raise ValueError("NPZ archive contains no arrays")
+            return archive[archive.files[0]]
+    raise ValueError(f"Not an array format: {fmt}")
+
+
+def _arrow_batches(source: BinaryIO, fmt: str, chunk_rows: int | None) -> Iterator[Any]:
+    """Record batches of a Parquet or Arrow IPC upload."""
+    buffer = pa.py_buffer(map_upload(source))
+    if fmt == PARQUET:
+        parquet_file = pq.ParquetFile(pa.BufferReader(buffer))
+        if chunk_rows:
+            yield from parquet_file.iter_batches(batch_size=chunk_rows)
+        else:
+            yield parquet_file.read()
+        return
+
+    # Arrow IPC: random access file format first, then the stream format
+    try:
+        reader = pa.ipc.open_file(pa.BufferReader(buffer))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        batches = iter(pa.ipc.open_stream(pa.BufferReader(buffer)))
+    if chunk_rows:
+        for batch in batches:
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows)
+    else:
+        yield pa.Table.from_batches(list(batches))
+
+
+def _frames_from_array(
+    array: np.ndarray, columns: Sequence[str] | None, chunk_rows: int | None, sequences: bool
+) -> Iterator[Any]:
+    if array.ndim == 3:
+        if not sequences:
+            raise ValueError("3-D arrays are only accepted by sequence models")
+        # Pre-built sequence windows, passed to the loader as is
+        yield array
+        return
+    if array.ndim != 2:
+        raise ValueError(f"Expected a 2-D or 3-D array, got shape {array.shape}")
+    if columns is None:
+        raise ValueError("This model does not accept NumPy uploads")
+    if array.shape[1] != len(columns):
+        raise ValueError(f"Expected {len(columns)} columns ({', '.join(columns)}), got {array.shape[1]}")
+    step = chunk_rows or len(array) or 1
+    for start in range(0, max(len(array), 1), step):
+        yield pd.DataFrame(array[start:start + step], columns=list(columns), copy=False)
+
+
+def read_frames(
+    source: BinaryIO,
+    fmt: str,
+    chunk_rows: int | None = None,
+    columns: Sequence[str] | None = None,
+    sequences: bool = False,
+    column_types: Mapping[str, str] | None = None,
+) -> Iterator[Any]:
+    """
+    Iterate over an upload as DataFrames, chunk_rows rows at a time (or all at once).
+    2-D NumPy arrays are labelled with the given column names; with
+    sequences=True, 3-D arrays are yielded unchanged as prepared windows.
+    column_types pins CSV columns to Arrow types ("float64", "bool", ...).
+    """
+    fmt, compression = split_compression(fmt)
+    if fmt == CSV and pacsv is not None:
+        for table in _csv_tables(source, compression, chunk_rows, column_types):
+            yield table.to_pandas(split_blocks=True)
+    elif fmt == CSV:
+        source = open_decompressed(source, compression)
+        if chunk_rows:
+            yield from pd.read_csv(source, chunksize=chunk_rows)
+        else:
+            yield pd.read_csv(source)
+    elif fmt in (PARQUET, ARROW):
+        if pa is None:
+            raise ValueError("pyarrow is required for Parquet and Arrow uploads")
+        for batch in _arrow_batches(source, fmt, chunk_rows):
+            yield batch.to_pandas(split_blocks=True, self_destruct=True)
+    elif fmt in (NPY, NPZ):
+        yield from _frames_from_array(read_array(source, fmt), columns, chunk_rows, sequences)
+    else:
+        raise ValueError(f"Unsupported upload format: {fmt}")
@@ -0,0 +1,29 @@
+"""
+Gunicorn Configuration
+Multi-worker serving with models shared across worker processes:
+
+    gunicorn app.main:app
+
+The app is imported once in the master (preload_app). Before the workers
+are forked, the sklearn models listed in PRELOAD_MODELS are loaded and the
+garbage collector is frozen, so their memory is shared copy-on-write by every
+worker instead of being unpickled once per process. The TensorFlow LSTM is
+never loaded in the master; each worker loads it on startup or first use.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# LSTM loading and large uploads can take a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported, before any worker is forked
+    from app.main import preload_before_fork
+
+    preload_before_fork()
@@ -0,0 +1,359 @@
+"""
+Benchmark Suite
+Times every model loader directly and the FastAPI app in-process on
+synthetic inputs scaled up from Model/sample_data and the CMAPSS dataset.
+Reports throughput, latency percentiles and peak memory, saves the results
+as a JSON baseline and compares a run against an earlier baseline.
+
+    python scripts/benchmark.py --sizes 1,1000,100000,1000000 --output baseline.json
+    python scripts/benchmark.py --compare baseline.json --tolerance 0.25
+    python scripts/benchmark.py --targets trees --sizes 1,1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+REPO_ROOT = SERVER_DIR.parent
+MODEL_DIR = REPO_ROOT / "Model"
+SAMPLE_DIR = MODEL_DIR / "sample_data"
+CMAPSS_DIR = MODEL_DIR / "dataset" / "CMAPSSData"
+
+# Repeated uploads must reach the models, not the response cache
+os.environ.setdefault("PREDICTION_CACHE_MAX_BYTES", "0")
+sys.path.insert(0, str(SERVER_DIR))
+
+SAMPLES = {
+    "engine_maintenance": "engine_maintenance_new_SD.csv",
+    "landing_gear_fault": "LandingGearFaultPrediction_sample.csv",
+    "landing_gear_rul": "LandingGearRUL_sample.csv",
+    "durability": "durability_sample.csv",
+    "remaining_useful_life": "remainingUsefulLife_lstm_sequence.csv",
+}
+
+# Smallest input each model can score (a full window for the sequence models)
+MIN_ROWS = {"engine_maintenance": 30, "remaining_useful_life": 30}
+
+DEFAULT_SIZES = "1,1000,100000,1000000"
+
+# Tree ensembles the compiled tree engine can score
+TREE_MODELS = ("engine_maintenance", "durability")
+
+
+def synthetic_frame(sample: pd.DataFrame, rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Tile the sample rows up to the requested size and jitter numeric columns
+    by 1% of their spread, so trees and the LSTM see varied inputs.
+    Boolean and integer code columns are tiled unchanged.
+    """
+    index = np.resize(np.arange(len(sample)), rows)
+    df = sample.iloc[index].reset_index(drop=True)
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype.kind != "f":
+            continue
+        spread = float(np.ptp(sample[column].to_numpy())) or abs(float(values[0])) or 1.0
+        df[column] = values + rng.normal(0.0, 0.01 * spread, rows)
+    if "cycle" in df.columns:
+        df["cycle"] = np.arange(1, rows + 1)
+    return df
+
+
+def cmapss_fleet(rows: int) -> pd.DataFrame:
+    """CMAPSS test_FD001 engines repeated (as new unit numbers) up to the requested rows."""
+    from app.remaining_useful_life_loader import read_cmapss
+
+    with open(CMAPSS_DIR / "test_FD001.txt", "rb") as f:
+        base = read_cmapss(f)
+    units = int(base["UnitNumber"].max())
+    copies = -(-rows // len(base))
+    parts = []
+    for copy in range(copies):
+        part = base.copy()
+        part["UnitNumber"] += copy * units
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True).iloc[:rows]
+
+
+def summarize(latencies: List[float], rows: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "repeats": len(ordered),
+        "latency_ms": {
+            "min": ordered[0] * 1000,
+            "p50": p50 * 1000,
+            "p95": percentile(0.95) * 1000,
+            "p99": percentile(0.99) * 1000,
+            "mean": statistics.fmean(ordered) * 1000,
+        },
+        "rows_per_second": rows / p50 if p50 > 0 else None,
+    }
+
+
+def measure(func: Callable[[], Any], rows: int, repeats: int, max_seconds: float) -> Dict[str, Any]:
+    """
+    One warm-up call, then up to `repeats` timed calls (fewer once max_seconds
+    is spent), then one call under tracemalloc for the peak Python allocation.
+    """
+    func()
+    latencies = []
+    budget_start = time.perf_counter()
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+        if time.perf_counter() - budget_start > max_seconds:
+            break
+    result = summarize(latencies, rows)
+
+    # Separate run: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result["peak_traced_bytes"] = peak
+    return result
+
+
+def build_loaders(names: List[str]) -> Dict[str, Any]:
+    from app.main import MODEL_SPECS
+
+    loaders = {}
+    for spec in MODEL_SPECS:
+        if spec.name not in names:
+            continue
+        path = MODEL_DIR / spec.filename
+        if not path.exists():
+            print(f"⚠️ Skipping {spec.name}: {path} not found")
+            continue
+        loader = spec.factory(path)
+        loader.load()
+        loaders[spec.name] = loader
+    return loaders
+
+
+def loader_cases(name: str, loader: Any, frame: pd.DataFrame) -> List[Tuple[str, Callable[[], Any]]]:
+    cases = [("predict", lambda: loader.predict(frame))]
+    if name == "engine_maintenance":
+        cases.append(("trajectory", lambda: loader.predict_windows(frame)))
+    return cases
+
+
+def run_loaders(
+    names: List[str], sizes: List[int], repeats: int, max_seconds: float, rng: np.random.Generator
+) -> List[Dict[str, Any]]:
+    results = []
+    loaders = build_loaders(names)
+    for name, loader in loaders.items():
+        sample = pd.read_csv(SAMPLE_DIR / SAMPLES[name])
+        for size in sizes:
+            rows = max(size, MIN_ROWS.get(name, 1))
+            frame = synthetic_frame(sample, rows, rng)
+            for case, func in loader_cases(name, loader, frame):
+                result = measure(func, rows, repeats, max_seconds)
+                results.append({"target": "loader", "model": name, "case": case, "rows": rows, **result})
+                report(results[-1])
+
+        if name == "remaining_useful_life":
+            for size in sizes:
+                fleet = cmapss_fleet(max(size, 100))
+                result = measure(lambda: loader.predict_fleet(fleet, raw=True), len(fleet), repeats, max_seconds)
+                results.append({"target": "loader", "model": name, "case": "fleet", "rows": len(fleet), **result})
+                report(results[-1])
+    return results
+
+
+def tree_inputs(name: str, loader: Any, frame: pd.DataFrame) -> np.ndarray:
+    """The array the tree ensemble itself is called with: one row per scored window or input row."""
+    if name == "engine_maintenance":
+        features, _ = loader.feature_extractor.transform_windows(frame)
+        return loader.scaler.transform(features)
+    return loader.prepare_data(frame)
+
+
+def run_trees(
+    names: List[str], sizes: List[int], repeats: int, max_seconds: float, rng: np.random.Generator
+) -> List[Dict[str, Any]]:
+    """
+    Time sklearn's predict_proba against the compiled tree engine (with no
+    row cap) on the same arrays, and check the probabilities are identical.
+    """
+    from app.tree_engine import CompiledTreeClassifier, compile_trees
+
+    results = []
+    loaders = build_loaders([name for name in names if name in TREE_MODELS])
+    for name, loader in loaders.items():
+        estimator = loader.model
+        if isinstance(estimator, CompiledTreeClassifier):
+            estimator = estimator.estimator
+        compiled = compile_trees(estimator, "compiled", max_rows=0)
+        sample = pd.read_csv(SAMPLE_DIR / SAMPLES[name])
+        for size in sizes:
+            # size counts scored rows, so engine uploads carry a full window per row
+            frame = synthetic_frame(sample, size + MIN_ROWS.get(name, 1) - 1, rng)
+            X = tree_inputs(name, loader, frame)
+            identical = bool(np.array_equal(estimator.predict_proba(X), compiled.predict_proba(X)))
+            if not identical:
+                print(f"❌ {name}: compiled probabilities differ from sklearn at {len(X):,} rows")
+            for case, model in (("sklearn", estimator), ("compiled", compiled)):
+                result = measure(lambda: model.predict_proba(X), len(X), repeats, max_seconds)
+                results.append({
+                    "target": "trees", "model": name, "case": case, "rows": len(X),
+                    "bit_identical": identical, **result,
+                })
+                report(results[-1])
+    return results
+
+
+def run_api(
+    names: List[str], sizes: List[int], repeats: int, max_seconds: float, rng: np.random.Generator
+) -> List[Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    results = []
+    with TestClient(app) as client:
+        for name in names:
+            if name not in client.get("/models").json()["models"]:
+                print(f"⚠️ Skipping API benchmark for {name}: model not available")
+                continue
+            sample = pd.read_csv(SAMPLE_DIR / SAMPLES[name])
+            for size in sizes:
+                rows = max(size, MIN_ROWS.get(name, 1))
+                payload = synthetic_frame(sample, rows, rng).to_csv(index=False).encode()
+
+                def post(payload: bytes = payload, name: str = name) -> None:
+                    response = client.post(
+                        f"/predict/{name}", files={"file": ("bench.csv", io.BytesIO(payload), "text/csv")}
+                    )
+                    response.raise_for_status()
+
+                result = measure(post, rows, repeats, max_seconds)
+                results.append({
+                    "target": "api", "model": name, "case": "predict", "rows": rows,
+                    "payload_bytes": len(payload), **result,
+                })
+                report(results[-1])
+    return results
+
+
+def report(result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    throughput = result["rows_per_second"] or 0.0
+    print(
+        f"📊 {result['target']:<6} {result['model']:<22} {result['case']:<10} "
+        f"rows={result['rows']:>9,}  p50={latency['p50']:>10.2f}ms  p95={latency['p95']:>10.2f}ms  "
+        f"{throughput:>14,.0f} rows/s  peak={result['peak_traced_bytes'] / 1e6:>8.1f}MB"
+    )
+
+
+def environment() -> Dict[str, Any]:
+    import sklearn
+
+    versions = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+    tf = sys.modules.get("tensorflow")
+    if tf is not None:
+        versions["tensorflow"] = tf.__version__
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+        # Process high-water mark, includes native (TensorFlow, BLAS) memory
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path, tolerance: float) -> bool:
+    """Print p50 latency changes against a baseline. False if any case regressed."""
+    with baseline_path.open() as f:
+        baseline = json.load(f)
+    previous = {
+        (r["target"], r["model"], r["case"], r["rows"]): r for r in baseline["results"]
+    }
+
+    ok = True
+    print(f"\nComparison against {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        key = (result["target"], result["model"], result["case"], result["rows"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        ratio = result["latency_ms"]["p50"] / old["latency_ms"]["p50"]
+        regressed = ratio > 1 + tolerance
+        ok = ok and not regressed
+        marker = "❌" if regressed else "✅"
+        print(
+            f"{marker} {key[0]:<6} {key[1]:<22} {key[2]:<10} rows={key[3]:>9,}  "
+            f"p50 {old['latency_ms']['p50']:.2f}ms -> {result['latency_ms']['p50']:.2f}ms ({ratio - 1:+.0%})"
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the model loaders and the prediction API.")
+    parser.add_argument("--models", default=",".join(SAMPLES), help="Comma separated model names")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated input row counts")
+    parser.add_argument("--targets", default="loader,api", help="loader, api and/or trees (sklearn vs compiled tree engine)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed calls per case")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Stop repeating a case after this long")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", type=Path, help="Compare p50 latencies against a baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown before failing")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.models.split(",") if n.strip()]
+    unknown = sorted(set(names) - set(SAMPLES))
+    if unknown:
+        parser.error(f"Unknown models: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    targets = {t.strip() for t in args.targets.split(",")}
+
+    rng = np.random.default_rng(args.seed)
+    results: List[Dict[str, Any]] = []
+    if "loader" in targets:
+        results += run_loaders(names, sizes, args.repeats, args.max_seconds, rng)
+    if "api" in targets:
+        results += run_api(names, sizes, args.repeats, args.max_seconds, rng)
+    if "trees" in targets:
+        results += run_trees(names, sizes, args.repeats, args.max_seconds, rng)
+
+    if args.output:
+        args.output.write_text(json.dumps({"environment": environment(), "results": results}, indent=2))
+        print(f"\n✅ Baseline written to {args.output}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
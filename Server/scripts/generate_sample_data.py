@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple
+import json
 import pickle
 
 import numpy as np
@@ -103,7 +104,7 @@ def align_columns(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
     return aligned[list(columns)]
 
 
-def build_lstm_sample(seq_length: int = 50) -> Tuple[pd.DataFrame, np.ndarray]:
+def build_lstm_sample(seq_length: int = 50) -> Tuple[pd.DataFrame, np.ndarray, Any]:
     index_cols = ["UnitNumber", "Cycle"]
     op_cols = [f"OpSet{i}" for i in range(1, 4)]
     sensor_cols = [f"Sensor{i}" for i in range(1, 22)]
@@ -153,7 +154,18 @@ def build_lstm_sample(seq_length: int = 50) -> Tuple[pd.DataFrame, np.ndarray]:
 
     seq_df = pd.DataFrame(seq, columns=feats)
     seq_array = np.expand_dims(seq, axis=0)
-    return seq_df, seq_array
+    return seq_df, seq_array, scaler
+
+
+def save_lstm_scaler(scaler: Any, path: Path) -> None:
+    # The API rebuilds the scaler from these to scale raw CMAPSS uploads
+    params = {
+        "columns": list(scaler.feature_names_in_),
+        "feature_range": list(scaler.feature_range),
+        "data_min": scaler.data_min_.tolist(),
+        "data_max": scaler.data_max_.tolist(),
+    }
+    path.write_text(json.dumps(params, indent=2) + "\n")
 
 
 def main() -> None:
@@ -211,17 +223,20 @@ def main() -> None:
         sample_df.to_csv(out_path, index=False)
         outputs[name] = out_path
 
-    lstm_df, lstm_array = build_lstm_sample(seq_length=50)
+    lstm_df, lstm_array, lstm_scaler = build_lstm_sample(seq_length=50)
     lstm_csv = OUTPUT_DIR / "remainingUsefulLife_lstm_sequence.csv"
     lstm_npy = OUTPUT_DIR / "remainingUsefulLife_lstm_sequence.npy"
     lstm_df.to_csv(lstm_csv, index=False)
     np.save(lstm_npy, lstm_array)
     outputs["remainingUsefulLife_lstm"] = lstm_csv
+    scaler_json = MODEL_DIR / "remainingUsefulLife_scaler.json"
+    save_lstm_scaler(lstm_scaler, scaler_json)
 
     print("Sample data generated:")
     for model_name, out_path in outputs.items():
         print(f"- {model_name}: {out_path}")
     print(f"- remainingUsefulLife_lstm (numpy): {lstm_npy}")
+    print(f"- remainingUsefulLife_lstm (scaler): {scaler_json}")
 
 
 if __name__ == "__main__":
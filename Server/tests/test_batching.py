@@ -0,0 +1,119 @@
+"""
+Micro-batching Tests
+Concurrent requests to MicroBatcher share one inference call and each get
+their own slice of its result, or their own error.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Any, List
+
+import pandas as pd
+import pytest
+
+from app.batching import MicroBatcher, predict_rows, split_result
+from app.durability_loader import DurabilityLoader
+from app.inference_executor import InferenceExecutor
+
+MODEL_DIR = Path(__file__).resolve().parents[2] / "Model"
+
+
+class Recorder:
+    """run_batch doubling every item, recording the batches it was given."""
+
+    def __init__(self):
+        self.batches: List[List[Any]] = []
+
+    def __call__(self, loader: Any, items: List[Any]) -> List[Any]:
+        self.batches.append(list(items))
+        if len(items) > 1 and any(item < 0 for item in items):
+            raise ValueError("bad item in batch")
+        if items[0] < 0:
+            raise ValueError(f"bad item {items[0]}")
+        return [(loader, item * 2) for item in items]
+
+
+def run(scenario, **options):
+    """Run scenario(batcher, recorder) with a fresh executor."""
+    executor = InferenceExecutor(default_concurrency=1, max_queue=4)
+    recorder = Recorder()
+    batcher = MicroBatcher("durability", executor, recorder, **options)
+    try:
+        return asyncio.run(scenario(batcher, recorder))
+    finally:
+        executor.shutdown()
+
+
+def test_concurrent_requests_share_a_batch():
+    async def scenario(batcher, recorder):
+        results = await asyncio.gather(*(batcher.submit("loader", item, rows=1) for item in (1, 2, 3)))
+        assert results == [("loader", 2), ("loader", 4), ("loader", 6)]
+        assert recorder.batches == [[1, 2, 3]]
+        stats = batcher.stats()
+        assert (stats["batches"], stats["requests"]) == (1, 3)
+        assert stats["requests_per_batch"]["4"] == 1
+
+    run(scenario, max_wait_ms=50)
+
+
+def test_max_rows_flushes_without_waiting():
+    async def scenario(batcher, recorder):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = asyncio.ensure_future(batcher.submit("loader", 1, rows=6))
+        second = asyncio.ensure_future(batcher.submit("loader", 2, rows=6))
+        assert await asyncio.gather(first, second) == [("loader", 2), ("loader", 4)]
+        assert loop.time() - started < 5
+        assert recorder.batches == [[1, 2]]
+
+    run(scenario, max_rows=10, max_wait_ms=10_000)
+
+
+def test_batches_are_split_by_loader():
+    async def scenario(batcher, recorder):
+        results = await asyncio.gather(
+            batcher.submit("old", 1, rows=1), batcher.submit("new", 2, rows=1), batcher.submit("new", 3, rows=1)
+        )
+        assert results == [("old", 2), ("new", 4), ("new", 6)]
+        assert recorder.batches == [[1], [2, 3]]
+
+    run(scenario, max_wait_ms=50)
+
+
+def test_failed_batch_gives_each_request_its_own_error():
+    async def scenario(batcher, recorder):
+        results = await asyncio.gather(
+            batcher.submit("loader", 1, rows=1), batcher.submit("loader", -1, rows=1), return_exceptions=True
+        )
+        assert results[0] == ("loader", 2)
+        assert isinstance(results[1], ValueError) and str(results[1]) == "bad item -1"
+        assert recorder.batches == [[1, -1], [1], [-1]]
+
+    run(scenario, max_wait_ms=50)
+
+
+def test_split_result():
+    result = {"predictions": [0, 1, 2, 1, 0], "probabilities": None, "unit": "cycles"}
+    parts = split_result(result, [2, 3])
+    assert parts == [
+        {"predictions": [0, 1], "probabilities": None, "unit": "cycles"},
+        {"predictions": [2, 1, 0], "probabilities": None, "unit": "cycles"},
+    ]
+
+
+def test_stacked_rows_match_separate_requests():
+    loader = DurabilityLoader(MODEL_DIR / "durability.pkl")
+    loader.load()
+    df = pd.read_csv(MODEL_DIR / "sample_data" / "durability_sample.csv")
+    frames = [df.iloc[:2], df.iloc[2:3], df.iloc[3:]]
+
+    assert predict_rows(loader, frames) == [loader.predict(frame) for frame in frames]
+
+
+@pytest.mark.parametrize("rows, bucket", [(1, "1"), (3, "4"), (5000, "+Inf")])
+def test_rows_histogram(rows, bucket):
+    async def scenario(batcher, recorder):
+        await batcher.submit("loader", 1, rows=rows)
+        assert batcher.stats()["rows_per_batch"][bucket] == 1
+
+    run(scenario, max_rows=10_000, max_wait_ms=1)
@@ -0,0 +1,98 @@
+"""
+Inference Executor Tests
+Each model lane admits at most its concurrency plus max_queue requests;
+the next one gets InferenceQueueFull, which endpoints answer with a 503.
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.inference_executor import InferenceExecutor, InferenceQueueFull
+from app import main
+from app import serving
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "Model" / "sample_data" / "durability_sample.csv"
+
+
+def test_full_lane_rejects_requests():
+    executor = InferenceExecutor(default_concurrency=2, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        futures = [executor.submit("durability", release.wait) for _ in range(3)]
+        assert executor.stats()["durability"] == {"concurrency": 2, "capacity": 3, "pending": 3}
+        with pytest.raises(InferenceQueueFull):
+            executor.submit("durability", release.wait)
+        # Lanes are per model
+        assert await executor.run("engine_maintenance", lambda: "other lane") == "other lane"
+
+        release.set()
+        await asyncio.gather(*futures)
+        assert executor.stats()["durability"]["pending"] == 0
+        assert await executor.run("durability", lambda: "room again") == "room again"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_call_waits_for_room():
+    executor = InferenceExecutor(default_concurrency=1, max_queue=0)
+    release = threading.Event()
+    started = threading.Event()
+    results = []
+
+    def hold():
+        started.set()
+        release.wait()
+        return "first"
+
+    first = threading.Thread(target=lambda: results.append(executor.call("durability", hold)))
+    first.start()
+    started.wait(5)
+    # Background callers wait for the lane instead of raising
+    second = threading.Thread(target=lambda: results.append(executor.call("durability", lambda: "second")))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    executor.shutdown()
+    assert results == ["first", "second"]
+
+
+def test_full_lane_is_a_503(monkeypatch):
+    executor = InferenceExecutor(default_concurrency=1, max_queue=0)
+    monkeypatch.setattr(serving, "executor", executor)
+    monkeypatch.setattr(main, "executor", executor)
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait()
+
+    busy = threading.Thread(target=executor.call, args=("durability", hold))
+    busy.start()
+    started.wait(5)
+    try:
+        # Registers the models without the other startup hooks (preloading, job workers)
+        serving.registry.refresh(keep_loaded=True)
+        client = TestClient(main.app)
+        with open(SAMPLE_CSV, "rb") as f:
+            response = client.post("/predict/durability", files={"file": (SAMPLE_CSV.name, f, "text/csv")})
+    finally:
+        release.set()
+        busy.join(5)
+        executor.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "busy" in response.json()["detail"]
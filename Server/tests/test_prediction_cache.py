@@ -0,0 +1,98 @@
+"""
+Prediction Cache Tests
+Cached responses are served for the same upload and loader version only,
+until they expire, are evicted or are invalidated.
+"""
+
+import io
+
+from app.prediction_cache import PredictionCache
+
+
+def test_hit_and_miss():
+    cache = PredictionCache(max_bytes=1024)
+    digest = PredictionCache.file_hash(io.BytesIO(b"a,b\n1,2\n"))
+    assert cache.get("durability", 1, digest) is None
+
+    cache.put("durability", 1, digest, "", "response", 10)
+    assert cache.get("durability", 1, digest) == "response"
+    # Other variants (response format, options) and models are separate entries
+    assert cache.get("durability", 1, digest, "columnar") is None
+    assert cache.get("landing_gear_fault", 1, digest) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_file_hash_rewinds():
+    upload = io.BytesIO(b"a,b\n1,2\n")
+    upload.read(3)
+    assert PredictionCache.file_hash(upload) == PredictionCache.file_hash(io.BytesIO(b"a,b\n1,2\n"))
+    assert upload.tell() == 0
+    assert PredictionCache.file_hash(upload) != PredictionCache.file_hash(io.BytesIO(b"a,b\n1,3\n"))
+
+
+def test_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.prediction_cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(max_bytes=1024, ttl_seconds=30)
+    cache.put("durability", 1, "digest", "", "response", 10)
+
+    now[0] += 29
+    assert cache.get("durability", 1, "digest") == "response"
+    now[0] += 2
+    assert cache.get("durability", 1, "digest") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_newer_version_drops_older_entries():
+    cache = PredictionCache(max_bytes=1024)
+    cache.put("durability", 1, "digest", "", "old", 10)
+    cache.put("engine_maintenance", 1, "digest", "", "other model", 10)
+
+    # A lookup from a reloaded model misses and drops the stale entries
+    assert cache.get("durability", 2, "digest") is None
+    assert cache.stats()["entries"] == 1
+    # A result computed by the old loader after the reload is not stored
+    cache.put("durability", 1, "digest", "", "old", 10)
+    assert cache.get("durability", 1, "digest") is None
+    # Nothing is cached for a model that is not loaded
+    cache.put("durability", None, "digest", "", "unknown", 10)
+    assert cache.get("durability", None, "digest") is None
+
+    cache.put("durability", 2, "digest", "", "new", 10)
+    assert cache.get("durability", 2, "digest") == "new"
+    assert cache.get("engine_maintenance", 1, "digest") == "other model"
+
+
+def test_invalidate():
+    cache = PredictionCache(max_bytes=1024)
+    for model_name in ("durability", "engine_maintenance"):
+        cache.put(model_name, 1, "digest", "", model_name, 10)
+
+    cache.invalidate("durability")
+    assert cache.get("durability", 1, "digest") is None
+    assert cache.get("engine_maintenance", 1, "digest") == "engine_maintenance"
+    cache.invalidate()
+    assert cache.get("engine_maintenance", 1, "digest") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(max_bytes=25)
+    cache.put("durability", 1, "a", "", "a", 10)
+    cache.put("durability", 1, "b", "", "b", 10)
+    assert cache.get("durability", 1, "a") == "a"
+
+    cache.put("durability", 1, "c", "", "c", 10)
+    assert cache.get("durability", 1, "b") is None
+    assert cache.get("durability", 1, "a") == "a"
+    assert cache.stats()["evictions"] == 1
+    # Values larger than the whole budget are never stored
+    cache.put("durability", 1, "d", "", "d", 26)
+    assert cache.get("durability", 1, "d") is None
+
+
+def test_disabled():
+    cache = PredictionCache(max_bytes=0)
+    cache.put("durability", 1, "digest", "", "response", 10)
+    assert not cache.enabled
+    assert cache.get("durability", 1, "digest") is None
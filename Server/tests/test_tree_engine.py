@@ -0,0 +1,95 @@
+"""
+Tree Engine Tests
+The compiled tree engine must return bit-for-bit the predict_proba and
+predict of the sklearn estimator it stands in for, on the shipped engine
+maintenance random forest and durability gradient boosting models.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.pipeline import Pipeline
+
+from app.durability_loader import DurabilityLoader
+from app.engine_maintenance_loader import SENSORS, EngineMaintenanceLoader
+from app.input_schema import unnamed_features
+from app.tree_engine import CompiledBoostingClassifier, CompiledForestClassifier
+
+MODEL_DIR = Path(__file__).resolve().parents[2] / "Model"
+SAMPLE_DIR = MODEL_DIR / "sample_data"
+TRAIN_FD001 = MODEL_DIR / "dataset" / "CMAPSSData" / "train_FD001.txt"
+
+
+def edge_rows(estimator, X: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """
+    Rows of X with features moved onto the split thresholds of the trees, or
+    within a float32 step of them, where only casting to float32 as sklearn
+    does picks the same branch. The models have no transformers in front of
+    their trees, so X is what the trees split on.
+    """
+    final = estimator[-1] if isinstance(estimator, Pipeline) else estimator
+    trees = np.ravel(final.estimators_)
+    split = [(t.tree_.feature, t.tree_.threshold) for t in trees]
+    thresholds = {
+        f: np.concatenate([thr[feature == f] for feature, thr in split]) for f in range(X.shape[1])
+    }
+    rng = np.random.default_rng(seed)
+    rows = X[rng.integers(len(X), size=n)].astype(np.float64)
+    for row in rows:
+        for f, values in thresholds.items():
+            if len(values) and rng.random() < 0.5:
+                value = rng.choice(values)
+                row[f] = value * (1 + rng.uniform(-1e-7, 1e-7)) if rng.random() < 0.5 else value
+    return rows
+
+
+def assert_same(compiled, X: np.ndarray) -> None:
+    estimator = compiled.estimator
+    with unnamed_features():
+        expected = estimator.predict_proba(X)
+        actual = compiled.predict_proba(X)
+        assert actual.dtype == expected.dtype
+        assert np.array_equal(actual, expected)
+        assert np.array_equal(compiled.predict(X), estimator.predict(X))
+        # One row at a time, as live telemetry and single requests score them
+        for row in X[:20]:
+            assert np.array_equal(compiled.predict_proba(row[None]), estimator.predict_proba(row[None]))
+
+
+def test_engine_maintenance_random_forest():
+    loader = EngineMaintenanceLoader(MODEL_DIR / "engine_maintenance_pipeline.pkl", tree_engine="compiled", max_rows=0)
+    loader.load()
+    assert isinstance(loader.model, CompiledForestClassifier)
+
+    # Whitespace separated: unit, cycle, 3 op settings, sensors s1..s21
+    raw = pd.read_csv(TRAIN_FD001, sep=r"\s+", header=None)
+    frames = [pd.read_csv(SAMPLE_DIR / "engine_maintenance_new_SD.csv")]
+    frames += [
+        pd.DataFrame({s: raw[raw[0] == unit][4 + int(s[1:])].to_numpy() for s in SENSORS}) for unit in (1, 2, 3)
+    ]
+    X = np.vstack([loader.scaler.transform(loader.feature_extractor.transform_windows(df)[0]) for df in frames])
+
+    assert_same(loader.model, X)
+    assert_same(loader.model, edge_rows(loader.model.estimator, X, 500))
+
+
+def test_durability_gradient_boosting():
+    loader = DurabilityLoader(MODEL_DIR / "durability.pkl", tree_engine="compiled", max_rows=0)
+    loader.load()
+    assert isinstance(loader.model, CompiledBoostingClassifier)
+
+    X = loader.prepare_data(pd.read_csv(SAMPLE_DIR / "durability_sample.csv"))
+
+    assert_same(loader.model, X)
+    assert_same(loader.model, edge_rows(loader.model.estimator, X, 2000))
+
+
+@pytest.mark.parametrize("max_rows", [1, 8])
+def test_large_batches_use_the_estimator(max_rows):
+    loader = DurabilityLoader(MODEL_DIR / "durability.pkl", tree_engine="compiled", max_rows=max_rows)
+    loader.load()
+    X = edge_rows(loader.model.estimator, loader.prepare_data(pd.read_csv(SAMPLE_DIR / "durability_sample.csv")), 64)
+
+    assert_same(loader.model, X)